@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from utils.ReadCache import ReadCache
+from .models import CacheVersion
+
+# Bodies smaller than this are cheaper to send as is than to compress
+GZIP_MIN_LENGTH = 512
+
+
+class MongoVersionStore:
+    """
+    Collection versions shared by every worker through the ``cache_versions`` collection.
+
+    Reads are memoized for ``refresh_interval`` seconds, which bounds how long a worker can keep
+    serving entries another worker has already invalidated. Bumps are visible locally at once.
+    """
+
+    def __init__(self, refresh_interval=1.0):
+        self.refresh_interval = refresh_interval
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(name)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        document = CacheVersion.objects(name=name).only('version').first()
+        version = document.version if document else 0
+        with self._lock:
+            self._versions[name] = (now + self.refresh_interval, version)
+        return version
+
+    def bump(self, name):
+        document = CacheVersion.objects(name=name).modify(upsert=True, new=True, inc__version=1)
+        with self._lock:
+            self._versions[name] = (time.monotonic() + self.refresh_interval, document.version)
+        return document.version
+
+
+# Per-worker cache for catalog reads. Views writing items or categories bump the matching version.
+catalog_cache = ReadCache(
+    max_entries=int(os.getenv('CATALOG_CACHE_MAX_ENTRIES', 1024)),
+    ttl=int(os.getenv('CATALOG_CACHE_TTL', 60)),
+    versions=MongoVersionStore(),
+)
+
+
+class CachedBody:
+    """Rendered JSON body of a response with its strong ETag and a lazily built gzip copy."""
+
+    def __init__(self, data):
+        self.body = JSONRenderer().render(data)
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # Strong validators are per representation, so the gzip coding gets its own tag
+        self.gzip_etag = f'"{digest}-gzip"'
+        self._gzipped = None
+
+    @property
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+    def matches(self, if_none_match):
+        etags = parse_etags(if_none_match)
+        return '*' in etags or self.etag in etags or self.gzip_etag in etags
+
+
+def cached_json_response(request, collections, builder):
+    """
+    Serve ``builder()`` through ``catalog_cache`` as a rendered, conditionally compressed JSON body.
+
+    Cache hits skip both serialization and compression. Requests whose ``If-None-Match`` carries
+    the current ETag get an empty ``304 Not Modified``.
+    """
+    entry = catalog_cache.get_or_set(collections, request.build_absolute_uri(), lambda: CachedBody(builder()))
+    use_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '') and len(entry.body) >= GZIP_MIN_LENGTH
+
+    if entry.matches(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    elif use_gzip:
+        response = HttpResponse(entry.gzipped, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(entry.body, content_type='application/json')
+    response['ETag'] = entry.gzip_etag if use_gzip else entry.etag
+    response['Vary'] = 'Accept-Encoding'
+    return response
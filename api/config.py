@@ -12,6 +12,7 @@ db_name = "uitcommerce"
 connect(
     db=db_name,
     host=os.getenv("MONGO_URL"),
+    tz_aware=True,  # Return stored dates as aware UTC datetimes
 )
 
 # Setup cloudinary
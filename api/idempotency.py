@@ -0,0 +1,94 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+from django.http import HttpResponse
+from mongoengine import NotUniqueError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+# A key still pending after this long belongs to a request that died, so a retry may take it over
+PENDING_TIMEOUT = timedelta(seconds=60)
+
+
+def _fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path}\n{payload}'.encode()).hexdigest()
+
+
+def _claim(key, fingerprint):
+    """
+    Insert the pending record for ``key``, or take over one abandoned by a crashed request.
+
+    The insert goes through the unique ``_id`` index, so of several concurrent duplicates exactly
+    one claims the key and runs the view. Returns None when claimed, else the existing record.
+    """
+    try:
+        IdempotencyRecord(key=key, fingerprint=fingerprint).save(force_insert=True)
+        return None
+    except NotUniqueError:
+        pass
+    now = datetime.now(timezone.utc)
+    stale = IdempotencyRecord.objects(key=key, fingerprint=fingerprint, status_code=None, created_at__lt=now - PENDING_TIMEOUT)
+    if stale.modify(set__created_at=now):
+        return None
+    return IdempotencyRecord.objects(key=key).first()
+
+
+def _render(response):
+    if isinstance(response, Response):
+        return JSONRenderer().render(response.data).decode()
+    return response.content.decode()
+
+
+def idempotent(scope):
+    """
+    Make a POST view replay its first response for requests carrying the same ``Idempotency-Key``.
+
+    Requests without the header run as usual. A retry whose body differs from the original gets
+    ``422``, and one arriving while the original is still running gets ``409``. Server errors are not
+    stored, so the client can retry them with the same key.
+
+    Args:
+        scope (str): Namespace for the keys, so the same key can be used against different endpoints.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            client_key = request.META.get(IDEMPOTENCY_HEADER)
+            if not client_key:
+                return view(request, *args, **kwargs)
+            if len(client_key) > MAX_KEY_LENGTH:
+                return Response({'success': False, 'message': 'Idempotency-Key is too long'}, status=400)
+
+            key = f'{scope}:{client_key}'
+            fingerprint = _fingerprint(request)
+            record = _claim(key, fingerprint)
+            if record is not None:
+                if record.fingerprint != fingerprint:
+                    return Response({'success': False, 'message': 'Idempotency-Key was used with a different request'}, status=422)
+                if record.status_code is None:
+                    response = Response({'success': False, 'message': 'A request with this Idempotency-Key is in progress'}, status=409)
+                    response['Retry-After'] = '1'
+                    return response
+                response = HttpResponse(record.body, status=record.status_code, content_type='application/json')
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                IdempotencyRecord.objects(key=key).delete()
+                raise
+            if response.status_code >= 500:
+                IdempotencyRecord.objects(key=key).delete()
+            else:
+                IdempotencyRecord.objects(key=key).update_one(set__status_code=response.status_code, set__body=_render(response))
+            return response
+        return wrapper
+    return decorator
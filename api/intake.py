@@ -0,0 +1,56 @@
+import logging
+import time
+from datetime import datetime, timezone
+
+from .models import OrderIntake
+from .placement import PlacementError, place_order
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next():
+    """
+    Atomically move the oldest queued request to ``processing`` and return it, or None.
+
+    The claim is a single ``find_one_and_update``, so concurrent workers never take the same request.
+    """
+    return OrderIntake.objects(state='queued').order_by('created_at').modify(
+        set__state='processing', set__claimed_at=datetime.now(timezone.utc), new=True,
+    )
+
+
+def fail_stale(stale_after):
+    """
+    Fail requests a worker claimed but never finished, e.g. because it was killed mid-placement.
+
+    They are not requeued, since the dead worker may already have created some of the orders.
+    """
+    cutoff = datetime.fromtimestamp(time.time() - stale_after, timezone.utc)
+    return OrderIntake.objects(state='processing', claimed_at__lt=cutoff).update(
+        set__state='failed', set__error='Order placement was interrupted', set__error_status=500,
+        set__finished_at=datetime.now(timezone.utc),
+    )
+
+
+def process(intake):
+    """Place a claimed request and record the outcome on it."""
+    try:
+        orders = place_order(intake.payload, time=intake.created_at)
+    except PlacementError as e:
+        outcome = {'set__state': 'failed', 'set__error': e.message, 'set__error_status': e.status_code}
+    except Exception as e:
+        logger.exception('Placing order intake %s failed', intake.id)
+        outcome = {'set__state': 'failed', 'set__error': str(e), 'set__error_status': 500}
+    else:
+        outcome = {'set__state': 'placed', 'set__order_ids': [order.id for order in orders]}
+    OrderIntake.objects(id=intake.id).update_one(set__finished_at=datetime.now(timezone.utc), **outcome)
+
+
+def run_worker(stop, poll_interval=0.5):
+    """Claim and place queued requests until ``stop`` is set, sleeping ``poll_interval`` when idle."""
+    while not stop.is_set():
+        intake = claim_next()
+        if intake is None:
+            stop.wait(poll_interval)
+            continue
+        process(intake)
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.management.base import BaseCommand, CommandError
+from pymongo import UpdateOne
+
+from api.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Convert Order.time values still stored as ISO strings into native dates, in batches. '
+        'Only string values are selected, so an interrupted run resumes where it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Orders converted per bulk write.')
+        parser.add_argument('--source-tz', default='UTC', help='Time zone the legacy timestamps were written in.')
+
+    def handle(self, *args, **options):
+        try:
+            source_tz = ZoneInfo(options['source_tz'])
+        except (ZoneInfoNotFoundError, ValueError):
+            raise CommandError(f"Unknown time zone: {options['source_tz']}")
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        collection = Order._get_collection()
+        converted, skipped = 0, []
+        last_id = None
+        while True:
+            query = {'time': {'$type': 'string'}}
+            if last_id is not None:
+                # Step past unparseable values, which would otherwise be selected again
+                query['_id'] = {'$gt': last_id}
+            batch = list(collection.find(query, {'time': 1}).sort('_id', 1).limit(batch_size))
+            if not batch:
+                break
+            last_id = batch[-1]['_id']
+
+            updates = []
+            for order in batch:
+                try:
+                    time = datetime.fromisoformat(order['time'])
+                except ValueError:
+                    skipped.append(order['_id'])
+                    continue
+                if time.tzinfo is None:
+                    time = time.replace(tzinfo=source_tz)
+                # Match the string too, so a concurrent update_order is never overwritten
+                updates.append(UpdateOne({'_id': order['_id'], 'time': order['time']}, {'$set': {'time': time.astimezone(timezone.utc)}}))
+            if updates:
+                converted += collection.bulk_write(updates, ordered=False).modified_count
+            self.stdout.write(f'Converted {converted} orders so far')
+
+        for order_id in skipped:
+            self.stderr.write(f'Could not parse the time of order {order_id}')
+        self.stdout.write(self.style.SUCCESS(f'Converted {converted} orders, skipped {len(skipped)}'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Shop, ShopSummary, Item
+
+
+class Command(BaseCommand):
+    help = 'Embed the shop summary (id, name, hotline) in every item, one bulk update per shop.'
+
+    def handle(self, *args, **options):
+        updated = 0
+        for shop in Shop.objects.only('name', 'hotline').no_cache():
+            updated += Item.objects(shop=shop.id).update(set__shop_summary=ShopSummary.from_shop(shop))
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} items'))
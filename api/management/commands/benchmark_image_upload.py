@@ -0,0 +1,68 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from utils.ImageUploader import ImageUploader
+
+DEFAULT_COUNTS = (1, 2, 4, 8)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the image work of items/create (rendering the listing variants of the main image and '
+        'uploading every image concurrently) for different numbers of uploaded images. Uploads go to '
+        'a local stand-in with a fixed latency unless --cloudinary is given, in which case the '
+        'uploaded assets are destroyed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--images', type=int, action='append', help='Images per item, main one included; repeatable.')
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per image count.')
+        parser.add_argument('--latency', type=float, default=0.3, help='Seconds each stand-in upload takes.')
+        parser.add_argument('--size', type=int, default=2000, help='Width in pixels of the generated images.')
+        parser.add_argument('--cloudinary', action='store_true', help='Upload to Cloudinary instead of the stand-in.')
+
+    def handle(self, *args, **options):
+        counts = options['images'] or DEFAULT_COUNTS
+        if options['runs'] <= 0 or min(counts) <= 0:
+            raise CommandError('--images and --runs must be positive')
+        from api.media import image_pipeline, image_uploader
+        if not options['cloudinary']:
+            image_uploader = ImageUploader(
+                upload=lambda file, timeout=None: self._fake_upload(file, options['latency']),
+                destroy=lambda public_id: None,
+                max_workers=image_uploader.max_workers,
+                timeout=image_uploader.timeout,
+            )
+        image = self._image(options['size'])
+
+        for count in counts:
+            timings = []
+            for _ in range(options['runs']):
+                files = [self._file(image, f'image-{number}.jpg') for number in range(count)]
+                started = time.perf_counter()
+                variants = image_pipeline.render(files[0])
+                uploads = image_uploader.upload_all(files + list(variants.values()))
+                timings.append(time.perf_counter() - started)
+                image_uploader.discard(uploads)
+            timings.sort()
+            self.stdout.write(self.style.SUCCESS(
+                f'{count} images ({count + len(variants)} uploads): median {timings[len(timings) // 2] * 1000:.0f} ms, '
+                f'best {timings[0] * 1000:.0f} ms, worst {timings[-1] * 1000:.0f} ms'
+            ))
+
+    def _image(self, width):
+        body = BytesIO()
+        Image.radial_gradient('L').resize((width, width * 3 // 4)).convert('RGB').save(body, 'JPEG', quality=90)
+        return body.getvalue()
+
+    def _file(self, image, name):
+        file = BytesIO(image)
+        file.name = name
+        return file
+
+    def _fake_upload(self, file, latency):
+        time.sleep(latency)
+        return {'secure_url': f'https://cdn.example.com/{file.name}', 'public_id': file.name}
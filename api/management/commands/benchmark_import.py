@@ -0,0 +1,82 @@
+import csv
+import io
+import random
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from api.models import Shop, Item
+from api.views.item import IMPORT_REQUIRED_FIELDS, import_items, search_engine
+
+CATEGORIES = ('Áo', 'Quần', 'Váy', 'Giày', 'Phụ kiện', 'Túi')
+
+
+class Command(BaseCommand):
+    help = (
+        'Time items/import with a generated CSV file into a scratch shop and report rows per second. '
+        'The scratch shop and its items are removed afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='CSV rows per import.')
+        parser.add_argument('--runs', type=int, default=3, help='Timed imports; the items are removed between runs.')
+        parser.add_argument('--invalid', type=float, default=0.01, help='Share of rows with an invalid price.')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch shop and the last run\'s items.')
+
+    def handle(self, *args, **options):
+        if options['rows'] <= 0 or options['runs'] <= 0:
+            raise CommandError('--rows and --runs must be positive')
+        Item.ensure_indexes()
+        content = self._csv(options['rows'], options['invalid'])
+        shop = Shop(name='Import benchmark', email='benchmark@example.com', password='-').save()
+        factory = APIRequestFactory()
+        try:
+            rates = []
+            for run in range(options['runs']):
+                if run:
+                    self._remove_items(shop)
+                upload = SimpleUploadedFile('items.csv', content, content_type='text/csv')
+                request = factory.post(f'/api/items/import/{shop.id}', {'file': upload}, format='multipart')
+                started = time.perf_counter()
+                response = import_items(request, str(shop.id))
+                elapsed = time.perf_counter() - started
+                if response.status_code != 200:
+                    raise CommandError(f'import_items answered {response.status_code}: {response.data["message"]}')
+                rates.append(options['rows'] / elapsed)
+                data = response.data['data']
+                self.stdout.write(f"Run {run + 1}: {data['imported']} imported, {data['failed']} failed in {elapsed:.2f} s")
+            rates.sort()
+            self.stdout.write(self.style.SUCCESS(
+                f"{options['rows']} rows: median {rates[len(rates) // 2]:.0f} rows/s, "
+                f'best {rates[-1]:.0f} rows/s, worst {rates[0]:.0f} rows/s'
+            ))
+        finally:
+            if not options['keep']:
+                self._remove_items(shop)
+                shop.delete()
+
+    def _csv(self, count, invalid):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=(*IMPORT_REQUIRED_FIELDS, 'colors', 'sizes', 'image'))
+        writer.writeheader()
+        for number in range(count):
+            writer.writerow({
+                'name': f'Benchmark item {number}',
+                'price': 'NaN' if random.random() < invalid else round(random.uniform(1, 500), 2),
+                'discount': random.choice((0, 5, 10, 20)),
+                'quantity': random.randint(0, 1000),
+                'description': 'Sản phẩm dùng để đo tốc độ nhập hàng',
+                'category': random.choice(CATEGORIES),
+                'colors': 'Đen, Trắng',
+                'sizes': 'S, M, L',
+                'image': 'https://example.com/benchmark.jpg',
+            })
+        return output.getvalue().encode('utf-8')
+
+    def _remove_items(self, shop):
+        for item_id in Item.objects(shop=shop.id).scalar('id'):
+            search_engine.remove(str(item_id))
+        Item.objects(shop=shop.id).delete()
+        Shop.objects(id=shop.id).update_one(set__items=[])
@@ -0,0 +1,105 @@
+import random
+import time
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Shop, Item
+from api.views.shop import SHOP_ITEM_ORDERING_FIELDS
+from utils.CustomPagination import get_paginator
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the first page and a deep page of a shop item listing with cursor pagination, next to '
+        'page-number pagination, on a scratch shop seeded with enough items to reach the deep page. '
+        'The paginators are timed directly because listing responses are cached. The scratch shop '
+        'and its items are removed afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', type=int, default=5000, help='Deep page to compare with the first one.')
+        parser.add_argument('--page-size', type=int, default=20, help='Items per page.')
+        parser.add_argument('--ordering', default='-id', help='Listing ordering: -id, price, -price, quantity or -quantity.')
+        parser.add_argument('--runs', type=int, default=20, help='Timed requests per page after one warm-up request.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Items inserted per insert_many.')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch shop and its items.')
+
+    def handle(self, *args, **options):
+        if min(options['page'], options['page_size'], options['runs'], options['batch_size']) <= 0:
+            raise CommandError('--page, --page-size, --runs and --batch-size must be positive')
+        if options['ordering'].lstrip('-') not in ('id', *SHOP_ITEM_ORDERING_FIELDS):
+            raise CommandError(f"Unsupported ordering {options['ordering']}")
+        Item.ensure_indexes()
+        shop = Shop(name='Pagination benchmark', email='benchmark@example.com', password='-').save()
+        try:
+            self._seed(shop, options['page'] * options['page_size'] + options['page_size'], options['batch_size'])
+            params = {'ordering': options['ordering'], 'page_size': options['page_size']}
+            deep_cursor = self._cursor(shop, params, (options['page'] - 1) * options['page_size'])
+
+            for label, query in (
+                ('cursor, page 1', {**params, 'pagination': 'cursor'}),
+                (f"cursor, page {options['page']}", {**params, 'cursor': deep_cursor}),
+                ('page number, page 1', {**params, 'page': 1}),
+                (f"page number, page {options['page']}", {**params, 'page': options['page']}),
+            ):
+                timings = self._time(shop, query, options['runs'])
+                self.stdout.write(self.style.SUCCESS(
+                    f'{label}: median {timings[len(timings) // 2] * 1000:.2f} ms, '
+                    f'best {timings[0] * 1000:.2f} ms, worst {timings[-1] * 1000:.2f} ms'
+                ))
+        finally:
+            if not options['keep']:
+                Item.objects(shop=shop.id).delete()
+                shop.delete()
+
+    def _request(self, shop, query):
+        return Request(APIRequestFactory().get(f'/api/items/get_all_shop_items/{shop.id}', query))
+
+    def _paginate(self, shop, request):
+        paginator = get_paginator(request, ordering_fields=SHOP_ITEM_ORDERING_FIELDS, default_ordering='-id')
+        page = paginator.paginate_queryset(Item.objects(shop=shop.id), request)
+        return paginator, page
+
+    def _cursor(self, shop, params, skipped):
+        # The cursor a client reaches after walking to the deep page points at the row before it
+        paginator, _ = self._paginate(shop, self._request(shop, {**params, 'pagination': 'cursor'}))
+        field = paginator.sort_field
+        sign = '-' if paginator.descending else ''
+        order_by = [sign + 'id'] if field == 'id' else [sign + field, sign + 'id']
+        boundary = Item.objects(shop=shop.id).order_by(*order_by).skip(skipped - 1).first()
+        return parse_qs(urlparse(paginator.encode_cursor(boundary, reverse=False)).query)['cursor'][0]
+
+    def _time(self, shop, query, runs):
+        request = self._request(shop, query)
+        self._paginate(shop, request)  # Warm-up
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            _, page = self._paginate(shop, request)
+            timings.append(time.perf_counter() - started)
+            if not page:
+                raise CommandError(f'Empty page for {query}')
+        timings.sort()
+        return timings
+
+    def _seed(self, shop, count, batch_size):
+        collection = Item._get_collection()
+        for offset in range(0, count, batch_size):
+            collection.insert_many([
+                {
+                    'name': f'Benchmark item {offset + number}',
+                    'price': round(random.uniform(1, 500), 2),
+                    'discount': 0.0,
+                    'quantity': float(random.randint(0, 1000)),
+                    'description': 'Pagination benchmark item',
+                    'category': 'Áo',
+                    'image': 'https://example.com/benchmark.jpg',
+                    'shop': shop.id,
+                    'active': True,
+                }
+                for number in range(min(batch_size, count - offset))
+            ], ordered=False)
+            self.stdout.write(f'Seeded {min(offset + batch_size, count)} of {count} items')
@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.SearchEngine import SearchEngine
+
+WORDS = (
+    'áo thun quần jean váy đầm giày dép túi xách mũ nón khăn choàng áo khoác sơ mi polo hoodie len '
+    'cotton lụa kaki nam nữ trẻ em đen trắng đỏ xanh vàng hồng tím xám nâu be size rộng ôm ngắn dài '
+    'basic cao cấp giá rẻ hàn quốc thể thao công sở dạo phố mùa hè mùa đông chính hãng'
+).split()
+CATEGORIES = ('Áo', 'Quần', 'Váy', 'Giày', 'Phụ kiện', 'Túi')
+DEFAULT_QUERIES = ('áo thun', 'quần jean nam', 'váy đầm công sở', 'giày thể thao chính hãng', 'hoodie')
+
+
+class Command(BaseCommand):
+    help = (
+        'Time a full build of the item search index over synthetic items, query latency on it, and '
+        'the latency of index writes while a rebuild runs in the background. No database is used.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000000, help='Synthetic items to index.')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per query.')
+        parser.add_argument('--query', action='append', help='Query to time; repeatable. Defaults to a fixed set.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic items.')
+
+    def handle(self, *args, **options):
+        if options['items'] <= 0 or options['runs'] <= 0:
+            raise CommandError('--items and --runs must be positive')
+        documents = self._documents(options['items'], options['seed'])
+        engine = SearchEngine(loader=lambda: iter(documents))
+
+        started = time.perf_counter()
+        engine.rebuild()
+        self.stdout.write(f'Built the index of {len(engine)} items in {time.perf_counter() - started:.1f} s')
+
+        for query in options['query'] or DEFAULT_QUERIES:
+            timings, results = self._time(lambda: engine.search(query), options['runs'])
+            self.stdout.write(f'{query!r}: {results} results, {self._summary(timings)}')
+
+        # Writes must keep flowing while a rebuild loads into a fresh index
+        rebuild = threading.Thread(target=engine.rebuild)
+        rebuild.start()
+        writes = []
+        while rebuild.is_alive():
+            started = time.perf_counter()
+            engine.add(f'benchmark-{len(writes)}', random.choice(DEFAULT_QUERIES))
+            writes.append(time.perf_counter() - started)
+            time.sleep(0.01)
+        rebuild.join()
+        writes.sort()
+        self.stdout.write(self.style.SUCCESS(f'{len(writes)} writes during the rebuild: {self._summary(writes)}'))
+
+    def _documents(self, count, seed):
+        rng = random.Random(seed)
+        return [
+            (str(number), ' '.join((
+                ' '.join(rng.choices(WORDS, k=4)),
+                rng.choice(CATEGORIES),
+                ' '.join(rng.choices(WORDS, k=rng.randint(8, 30))),
+            )))
+            for number in range(count)
+        ]
+
+    def _time(self, call, runs):
+        call()  # Warm-up
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = call()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return timings, len(result)
+
+    def _summary(self, timings):
+        return (
+            f'median {timings[len(timings) // 2] * 1000:.2f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95)] * 1000:.2f} ms, worst {timings[-1] * 1000:.2f} ms'
+        )
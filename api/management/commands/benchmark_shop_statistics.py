@@ -0,0 +1,71 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+
+from api.models import Shop, Order, ShopDailySales
+from api.views.shop import get_statistics
+
+
+class Command(BaseCommand):
+    help = (
+        'Time shops/get_statistics against a scratch shop seeded with many orders spread over the '
+        'last few years. The scratch shop and its orders are removed afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000000, help='Orders to seed for the scratch shop.')
+        parser.add_argument('--years', type=int, default=3, help='Years of history the orders are spread over.')
+        parser.add_argument('--runs', type=int, default=5, help='Timed requests after one warm-up request.')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Orders inserted per insert_many.')
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch shop and its orders.')
+
+    def handle(self, *args, **options):
+        if options['orders'] <= 0 or options['runs'] <= 0 or options['batch_size'] <= 0:
+            raise CommandError('--orders, --runs and --batch-size must be positive')
+        Order.ensure_indexes()
+        shop = Shop(name='Statistics benchmark', email='benchmark@example.com', password='-').save()
+        try:
+            self._seed(shop, options['orders'], options['years'], options['batch_size'])
+            # Seeded orders bypass the write path, so build their daily rollups in one go
+            call_command('rebuild_daily_sales', shop=str(shop.id), stdout=self.stdout)
+            request = APIRequestFactory().get(f'/api/shops/get_statistics/{shop.id}')
+            get_statistics(request, str(shop.id))  # Warm-up
+
+            timings = []
+            for _ in range(options['runs']):
+                started = time.perf_counter()
+                response = get_statistics(request, str(shop.id))
+                timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(f'get_statistics answered {response.status_code}: {response.data}')
+            timings.sort()
+            self.stdout.write(self.style.SUCCESS(
+                f"{options['orders']} orders: median {timings[len(timings) // 2] * 1000:.1f} ms, "
+                f'best {timings[0] * 1000:.1f} ms, worst {timings[-1] * 1000:.1f} ms'
+            ))
+        finally:
+            if not options['keep']:
+                Order.objects(shop=shop.id).delete()
+                ShopDailySales.objects(shop=shop.id).delete()
+                shop.delete()
+
+    def _seed(self, shop, count, years, batch_size):
+        now = datetime.now(timezone.utc)
+        span = timedelta(days=365 * years).total_seconds()
+        collection = Order._get_collection()
+        for offset in range(0, count, batch_size):
+            collection.insert_many([
+                {
+                    'shop': shop.id,
+                    'status': 'delivered',
+                    'total': round(random.uniform(1, 500), 2),
+                    'time': now - timedelta(seconds=random.uniform(0, span)),
+                    'updated_at': now,
+                }
+                for _ in range(min(batch_size, count - offset))
+            ], ordered=False)
+            self.stdout.write(f'Seeded {min(offset + batch_size, count)} of {count} orders')
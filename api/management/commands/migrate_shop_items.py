@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Shop, Item
+
+
+class Command(BaseCommand):
+    help = (
+        'Switch shops between a stored Shop.items list and items derived from the Item.shop index. '
+        '--drop removes the stored lists, --restore rebuilds them from Item.shop.'
+    )
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument('--drop', action='store_true', help='Unset Shop.items on every shop (requires SHOP_ITEMS_STORED=false).')
+        group.add_argument('--restore', action='store_true', help='Rebuild Shop.items from Item.shop (requires SHOP_ITEMS_STORED=true).')
+
+    def handle(self, *args, **options):
+        if options['drop']:
+            if settings.SHOP_ITEMS_STORED:
+                raise CommandError('Set SHOP_ITEMS_STORED=false and redeploy before dropping the stored lists')
+            updated = Shop.objects(items__exists=True).update(unset__items=True)
+            self.stdout.write(self.style.SUCCESS(f'Dropped the item list of {updated} shops'))
+            return
+
+        if not settings.SHOP_ITEMS_STORED:
+            raise CommandError('Set SHOP_ITEMS_STORED=true and redeploy before restoring the stored lists')
+        restored = 0
+        for shop_id in Shop.objects.scalar('id').no_cache():
+            Shop.objects(id=shop_id).update_one(set__items=list(Item.objects(shop=shop_id).scalar('id')))
+            restored += 1
+        self.stdout.write(self.style.SUCCESS(f'Restored the item list of {restored} shops'))
@@ -0,0 +1,59 @@
+from bson import ObjectId
+from django.core.management.base import BaseCommand, CommandError
+from pymongo import ReplaceOne
+
+from api.models import Order, ShopDailySales
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the shop_daily_sales rollup from the orders, for the initial backfill or to repair '
+        'drift. Run backfill_order_times first; orders whose time is not a date are left out.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', help='Only rebuild the rollup of this shop.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rollup documents written per bulk write.')
+
+    def handle(self, *args, **options):
+        match = {'time': {'$type': 'date'}, 'shop': {'$ne': None}}
+        if options['shop']:
+            if not ObjectId.is_valid(options['shop']):
+                raise CommandError('Invalid shop id')
+            match['shop'] = ObjectId(options['shop'])
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive')
+
+        days = Order._get_collection().aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': {
+                    'shop': '$shop',
+                    'day': {'$dateFromParts': {'year': {'$year': '$time'}, 'month': {'$month': '$time'}, 'day': {'$dayOfMonth': '$time'}}},
+                },
+                'orders': {'$sum': 1},
+                'revenue': {'$sum': {'$ifNull': ['$total', 0]}},
+                'items_sold': {'$sum': {'$sum': '$items.quantity'}},
+            }},
+        ], allowDiskUse=True)
+
+        collection = ShopDailySales._get_collection()
+        rebuilt, requests = {}, []
+        for day in days:
+            key = {'shop': day['_id']['shop'], 'day': day['_id']['day']}
+            rollup = dict(key, orders=day['orders'], revenue=float(day['revenue']), items_sold=float(day['items_sold']))
+            requests.append(ReplaceOne(key, rollup, upsert=True))
+            rebuilt.setdefault(key['shop'], []).append(key['day'])
+            if len(requests) >= options['batch_size']:
+                collection.bulk_write(requests, ordered=False)
+                requests = []
+        if requests:
+            collection.bulk_write(requests, ordered=False)
+
+        # Rollups of days that no longer have any orders
+        stale = {'shop': match['shop']} if options['shop'] else {}
+        removed = 0
+        for shop_id in set(rebuilt) | set(collection.distinct('shop', stale)):
+            removed += collection.delete_many({'shop': shop_id, 'day': {'$nin': rebuilt.get(shop_id, [])}}).deleted_count
+        total = sum(len(days) for days in rebuilt.values())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} daily rollups, removed {removed} stale ones'))
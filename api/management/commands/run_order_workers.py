@@ -0,0 +1,57 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _work(stop, poll_interval):
+    # Spawned children start from a fresh interpreter, so they set up Django and open their own
+    # MongoDB connection instead of sharing the parent's client across a fork
+    import django
+    django.setup()
+    from api import config  # noqa: F401  Connects to MongoDB
+    from api.intake import run_worker
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_worker(stop, poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Run a pool of worker processes placing the orders queued through orders/intake.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(), help='Worker processes to run.')
+        parser.add_argument('--poll-interval', type=float, default=0.5, help='Seconds an idle worker waits before polling again.')
+        parser.add_argument('--stale-after', type=int, default=300, help='Seconds after which an unfinished claim is failed.')
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 0:
+            raise CommandError('--processes must be positive')
+        from api import config  # noqa: F401  Connects to MongoDB
+        from api.intake import fail_stale
+
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        workers = [
+            context.Process(target=_work, args=(stop, options['poll_interval']), name=f'order-worker-{number}')
+            for number in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {len(workers)} order workers')
+
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        try:
+            while not stop.wait(options['stale_after'] / 2):
+                failed = fail_stale(options['stale_after'])
+                if failed:
+                    self.stderr.write(f'Failed {failed} interrupted order requests')
+                if not all(worker.is_alive() for worker in workers):
+                    raise CommandError('An order worker exited unexpectedly')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Order workers stopped'))
@@ -0,0 +1,9 @@
+import cloudinary.uploader
+
+from utils.ImageUploader import ImageUploader
+from utils.ImagePipeline import ImagePipeline
+from . import config  # noqa: F401  Cloudinary credentials are set when config is imported
+
+# Process-wide pools shared by the views that accept image uploads
+image_uploader = ImageUploader(upload=cloudinary.uploader.upload, destroy=cloudinary.uploader.destroy)
+image_pipeline = ImagePipeline()
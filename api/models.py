@@ -1,4 +1,7 @@
-from mongoengine import Document, StringField, EmailField, DecimalField, DictField, ReferenceField, ListField, LazyReferenceField, BooleanField
+from datetime import datetime, timezone
+
+from django.conf import settings
+from mongoengine import Document, EmbeddedDocument, StringField, EmailField, DecimalField, DictField, ReferenceField, ListField, LazyReferenceField, BooleanField, IntField, DateTimeField, ObjectIdField, EmbeddedDocumentField
 
 class User(Document):
     name = StringField(required=True)
@@ -7,6 +10,7 @@ class User(Document):
     address = StringField()
     password = StringField(required=True)
     profile_picture = StringField()
+    profile_picture_variants = DictField()  # Resized WebP copies keyed by width
     orders = ListField(ReferenceField('Order'))
     meta = {
         'collection': 'users'  # Specify the collection name as 'users'
@@ -22,6 +26,22 @@ class Shop(Document):
     meta = {
         'collection': 'shops'  # Specify the collection name as 'shops'
     }
+
+    def item_ids(self):
+        # Read the stored references without dereferencing them, or query the Item.shop index
+        if settings.SHOP_ITEMS_STORED:
+            return [getattr(ref, 'id', ref) for ref in self._data.get('items') or []]
+        return list(Item.objects(shop=self.id).scalar('id'))
+class ShopSummary(EmbeddedDocument):
+    # Denormalized copy of the shop fields item listings show, kept in sync by update_shop
+    id = ObjectIdField(required=True)
+    name = StringField()
+    hotline = StringField()
+
+    @classmethod
+    def from_shop(cls, shop):
+        return cls(id=shop.id, name=shop.name, hotline=shop.hotline)
+
 class Item(Document):
     name = StringField(required=True, max_length=100)
     price = DecimalField(required=True, precision=2, min_value=0)
@@ -33,11 +53,32 @@ class Item(Document):
     category = StringField(required=True)
     image = StringField(required=True)
     detail_image = ListField(StringField(required=True))
+    image_variants = DictField()  # Resized WebP copies of image keyed by width
     shop = ReferenceField(Shop, reverse_delete_rule=2)
+    shop_summary = EmbeddedDocumentField(ShopSummary)
     active = BooleanField(default=True)
     
     meta = {
-        'collection': 'items'  # Specify the collection name as 'items'
+        'collection': 'items',  # Specify the collection name as 'items'
+        'indexes': [
+            # Keyset pagination on sorted listings walks (sort_field, _id)
+            ('price', 'id'),
+            ('discount', 'id'),
+            ('quantity', 'id'),
+            ('name', 'id'),
+            # Catalog filters: equality fields first, then the price range
+            ('category', 'active', 'price'),
+            # Shop listings: newest, price and stock orderings, over all of a shop's items and within (shop, active)
+            ('shop', '-id'),
+            ('shop', 'price', 'id'),
+            ('shop', 'quantity', 'id'),
+            ('shop', 'active', '-id'),
+            ('shop', 'active', 'price', 'id'),
+            ('shop', 'active', 'quantity', 'id'),
+            ('colors', 'active', 'price'),
+            ('sizes', 'active', 'price'),
+            ('active', 'price'),
+        ]
     }
 class Order(Document):
     user = ReferenceField(User)
@@ -46,11 +87,25 @@ class Order(Document):
     status = StringField()
     address = StringField()
     total = DecimalField()
-    time = StringField()
+    time = DateTimeField()  # Stored as a BSON date in UTC; run `backfill_order_times` for legacy strings
     is_paid = BooleanField()
+    updated_at = DateTimeField(default=lambda: datetime.now(timezone.utc))  # Bumped on every write; drives the order feed
     meta = {
-        'collection': 'orders'  # Specify the collection name as 'orders'
+        'collection': 'orders',  # Specify the collection name as 'orders'
+        'indexes': [
+            # Newest-first order listings, keyset paginated on (time, id), optionally by status.
+            # The shop one also serves the statistics' time range scans.
+            ('user', '-time', '-id'),
+            ('shop', '-time', '-id'),
+            ('shop', 'status', '-time', '-id'),
+            # Polling fallback of the shop order feed
+            ('shop', 'updated_at', 'id'),
+        ],
     }
+
+    def save(self, *args, **kwargs):
+        self.updated_at = datetime.now(timezone.utc)
+        return super().save(*args, **kwargs)
 class Category(Document):
     name = StringField(required=True, max_length=100)
 
@@ -80,4 +135,61 @@ class Report(Document):
 
     meta = {
         'collection': 'reports'  # Specify the collection name as 'reports'
-    }
\ No newline at end of file
+    }
+class CacheVersion(Document):
+    name = StringField(primary_key=True)
+    version = IntField(default=0)
+
+    meta = {
+        'collection': 'cache_versions'  # Specify the collection name as 'cache_versions'
+    }
+
+class IdempotencyRecord(Document):
+    key = StringField(primary_key=True)  # Scope and client Idempotency-Key, unique through _id
+    fingerprint = StringField(required=True)  # Hash of the request that claimed the key
+    status_code = IntField()  # None while the first request is still running
+    body = StringField()
+    created_at = DateTimeField(default=lambda: datetime.now(timezone.utc))
+
+    meta = {
+        'collection': 'idempotency_records',  # Specify the collection name as 'idempotency_records'
+        'indexes': [
+            # Keys are replayable for a day, then MongoDB's TTL monitor drops them
+            {'fields': ['created_at'], 'expireAfterSeconds': 24 * 60 * 60},
+        ],
+    }
+
+class OrderIntake(Document):
+    payload = DictField(required=True)  # The create_order request body
+    state = StringField(choices=('queued', 'processing', 'placed', 'failed'), default='queued')
+    order_ids = ListField(ObjectIdField())  # Orders created once placed
+    error = StringField()
+    error_status = IntField()  # HTTP status create_order would have answered the failure with
+    created_at = DateTimeField(default=lambda: datetime.now(timezone.utc))
+    claimed_at = DateTimeField()
+    finished_at = DateTimeField()
+
+    meta = {
+        'collection': 'order_intake',  # Specify the collection name as 'order_intake'
+        'indexes': [
+            # Workers claim the oldest request of a state
+            ('state', 'created_at'),
+            # Finished requests stay pollable for a week; queued ones have no finished_at and never expire
+            {'fields': ['finished_at'], 'expireAfterSeconds': 7 * 24 * 60 * 60},
+        ],
+    }
+
+class ShopDailySales(Document):
+    shop = ObjectIdField(required=True)
+    day = DateTimeField(required=True)  # Midnight UTC of the day the orders were placed
+    orders = IntField(default=0)
+    revenue = DecimalField(default=0)
+    items_sold = DecimalField(default=0)
+
+    meta = {
+        'collection': 'shop_daily_sales',  # Specify the collection name as 'shop_daily_sales'
+        'indexes': [
+            # One rollup per shop and day; statistics read a shop's days by range
+            {'fields': ['shop', 'day'], 'unique': True},
+        ],
+    }
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import time
+
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from mongoengine.queryset.visitor import Q
+from pymongo import AsyncMongoClient
+from pymongo.errors import OperationFailure
+
+from .models import Order
+from .serializers import OrderSummarySerializer
+
+# Server error codes meaning change streams are unavailable (standalone server) or cannot resume
+CHANGE_STREAM_UNSUPPORTED = (40573, 40324)
+CHANGE_STREAM_HISTORY_LOST = 286
+
+_client = None
+
+
+def _async_client():
+    # Created lazily so it binds to the event loop of the ASGI worker serving the feed
+    global _client
+    if _client is None:
+        _client = AsyncMongoClient(os.getenv('MONGO_URL'), tz_aware=True)
+    return _client
+
+
+def _event(name, data=None, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+@sync_to_async(thread_sensitive=False)
+def _summarize(orders):
+    return OrderSummarySerializer(orders, many=True).data
+
+
+class OrderFeed:
+    """
+    Server-sent events of one shop's new orders and order status changes.
+
+    On a replica set the events come from a change stream, resumed from the ``id`` of the last event
+    the client saw. Elsewhere, or with ``ORDER_FEED_CHANGE_STREAMS`` off, the feed polls the shop's
+    orders by ``updated_at`` instead and reports every order write, not only status changes. Each
+    ``order`` event carries the compact order. A ``reset`` event means the resume point was lost
+    and the client should reload the listing. Comment lines keep idle connections open.
+    """
+
+    def __init__(self, shop_id, last_event_id=None, keepalive=15, poll_interval=2):
+        self.shop_id = ObjectId(shop_id)
+        self.last_event_id = last_event_id or ''
+        self.keepalive = keepalive
+        self.poll_interval = poll_interval
+
+    async def stream(self):
+        yield f'retry: {int(self.poll_interval * 1000)}\n\n'
+        if settings.ORDER_FEED_CHANGE_STREAMS and not self.last_event_id.startswith('p.'):
+            try:
+                async for chunk in self._change_stream():
+                    yield chunk
+                return
+            except OperationFailure as e:
+                if e.code not in CHANGE_STREAM_UNSUPPORTED:
+                    raise
+        async for chunk in self._poll():
+            yield chunk
+
+    async def _change_stream(self):
+        pipeline = [{'$match': {
+            'fullDocument.shop': self.shop_id,
+            '$or': [
+                {'operationType': 'insert'},
+                {'operationType': 'update', 'updateDescription.updatedFields.status': {'$exists': True}},
+            ],
+        }}]
+        resume_after = None
+        if self.last_event_id.startswith('c.'):
+            resume_after = {'_data': self.last_event_id[2:]}
+        collection = _async_client()[Order._get_db().name][Order._get_collection_name()]
+
+        try:
+            stream = await collection.watch(pipeline, full_document='updateLookup', resume_after=resume_after, max_await_time_ms=self.keepalive * 1000)
+        except OperationFailure as e:
+            if e.code != CHANGE_STREAM_HISTORY_LOST:
+                raise
+            yield _event('reset')
+            stream = await collection.watch(pipeline, full_document='updateLookup', max_await_time_ms=self.keepalive * 1000)
+
+        async with stream:
+            while stream.alive:
+                change = await stream.try_next()
+                if change is None:
+                    yield ': keepalive\n\n'
+                    continue
+                data, = await _summarize([Order._from_son(change['fullDocument'])])
+                yield _event('order', data, event_id=f"c.{change['_id']['_data']}")
+
+    async def _poll(self):
+        position = self._poll_position()
+        if position is None:
+            if self.last_event_id:
+                yield _event('reset')
+            # Start from now; earlier orders are what the client already listed
+            position = await sync_to_async(self._latest_position, thread_sensitive=False)()
+
+        idle_since = time.monotonic()
+        while True:
+            orders = await sync_to_async(self._changed_since, thread_sensitive=False)(position)
+            if orders:
+                for order, data in zip(orders, await _summarize(orders)):
+                    yield _event('order', data, event_id=f'p.{order.updated_at.isoformat()}|{order.id}')
+                position = (orders[-1].updated_at, orders[-1].id)
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= self.keepalive:
+                yield ': keepalive\n\n'
+                idle_since = time.monotonic()
+            await asyncio.sleep(self.poll_interval)
+
+    def _poll_position(self):
+        if not self.last_event_id.startswith('p.'):
+            return None
+        updated_at, _, order_id = self.last_event_id[2:].partition('|')
+        try:
+            updated_at = parse_datetime(updated_at)
+        except ValueError:
+            return None
+        if updated_at is None or not ObjectId.is_valid(order_id):
+            return None
+        return updated_at, ObjectId(order_id)
+
+    def _latest_position(self):
+        order = Order.objects(shop=self.shop_id, updated_at__ne=None).order_by('-updated_at', '-id').only('updated_at').first()
+        return (order.updated_at, order.id) if order else None
+
+    def _changed_since(self, position):
+        orders = Order.objects(shop=self.shop_id, updated_at__ne=None)
+        if position is not None:
+            updated_at, order_id = position
+            orders = orders.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=order_id))
+        return list(orders.order_by('updated_at', 'id').limit(100))
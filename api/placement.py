@@ -0,0 +1,209 @@
+import logging
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from django.conf import settings
+
+from .models import Order, User, Shop, Item
+from .rollup import record_created
+
+logger = logging.getLogger(__name__)
+
+
+class PlacementError(Exception):
+    """An order request that cannot be placed, with the HTTP status describing why."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def validate_order_request(data):
+    """
+    Check the shape of an order request without touching the database.
+
+    Raises:
+        PlacementError: If the user id, the item lines or a line quantity is invalid.
+    """
+    if not ObjectId.is_valid(str(data.get('user_id'))):
+        raise PlacementError('Invalid user id', 400)
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise PlacementError('Order has no items', 400)
+    for item in items:
+        if not isinstance(item, dict) or not ObjectId.is_valid(str(item.get('id'))) or not ObjectId.is_valid(str(item.get('shop_id'))):
+            raise PlacementError('Invalid item', 400)
+        item_quantity = item.get('quantity')
+        if isinstance(item_quantity, bool) or not isinstance(item_quantity, (int, float)) or item_quantity <= 0:
+            raise PlacementError('Invalid item quantity', 400)
+
+
+def _reserve_stock(lines):
+    """
+    Take each cart line's quantity out of stock with a conditional atomic decrement.
+
+    A line only matches while the item still has ``quantity >= requested``, so concurrent orders can
+    never drive stock negative or overwrite each other. If a line cannot be reserved, the lines
+    already reserved are put back and False is returned.
+    """
+    reserved = []
+    for line in lines:
+        # Raw $inc because the field's min_value check would reject the negative operand
+        updated = Item.objects(id=line.get('id'), quantity__gte=line.get('quantity')).update_one(__raw__={'$inc': {'quantity': -line.get('quantity')}})
+        if not updated:
+            _release_stock(reserved)
+            return False
+        reserved.append(line)
+    return True
+
+
+def _release_stock(lines):
+    """Compensate earlier reservations by adding the quantities back."""
+    for line in lines:
+        Item.objects(id=line.get('id')).update_one(__raw__={'$inc': {'quantity': line.get('quantity')}})
+
+
+class _OutOfStock(Exception):
+    pass
+
+
+def _record_sales(orders):
+    """
+    Add placed orders to the daily sales rollup.
+
+    The orders already exist at this point, so a failure is logged rather than raised: failing the
+    request would make clients retry an order that was placed. ``rebuild_daily_sales`` repairs
+    the drift.
+    """
+    for order in orders:
+        try:
+            record_created(order)
+        except Exception:
+            logger.exception('Could not add order %s to the daily sales rollup', order.id)
+
+
+def _place_orders(lines, items_by_shop, build_order):
+    """
+    Reserve stock for ``lines`` and save one order per shop, compensating by hand on failure.
+
+    Raises:
+        _OutOfStock: If any line could not be reserved; nothing is written in that case.
+    """
+    if not _reserve_stock(lines):
+        raise _OutOfStock()
+    orders = []
+    try:
+        for shop_id, shop_items in items_by_shop.items():
+            order = build_order(shop_id, shop_items)
+            order.save()
+            orders.append(order)
+    except Exception:
+        # Undo the whole placement so a failed order never keeps stock reserved
+        for order in orders:
+            order.delete()
+        _release_stock(lines)
+        raise
+    _record_sales(orders)
+    return orders
+
+
+def _place_orders_in_transaction(lines, items_by_shop, build_order):
+    """
+    Reserve stock for ``lines`` and insert one order per shop inside a single MongoDB transaction.
+
+    ``with_transaction`` reruns the whole placement on ``TransientTransactionError`` and retries the
+    commit on ``UnknownTransactionCommitResult``. mongoengine has no session support, so the writes
+    go through the underlying pymongo collections. Requires a replica set or sharded cluster.
+
+    Raises:
+        _OutOfStock: If any line could not be reserved; the transaction is aborted.
+    """
+    items = Item._get_collection()
+    order_collection = Order._get_collection()
+
+    def place(session):
+        # Rebuilt from scratch on every attempt, since a retried callback starts over
+        orders = []
+        for line in lines:
+            result = items.update_one(
+                {'_id': ObjectId(line.get('id')), 'quantity': {'$gte': line.get('quantity')}},
+                {'$inc': {'quantity': -line.get('quantity')}},
+                session=session,
+            )
+            if not result.modified_count:
+                raise _OutOfStock()
+        for shop_id, shop_items in items_by_shop.items():
+            order = build_order(shop_id, shop_items)
+            order.validate()
+            order.id = order_collection.insert_one(order.to_mongo(), session=session).inserted_id
+            orders.append(order)
+        return orders
+
+    with order_collection.database.client.start_session() as session:
+        orders = session.with_transaction(place)
+    # After the commit: inside the transaction every order of a shop would conflict on its rollup
+    _record_sales(orders)
+    return orders
+
+
+
+def place_order(data, time=None):
+    """
+    Place an order request, creating one order per shop in the cart.
+
+    Stock for every cart line is reserved with a conditional atomic decrement before any order is
+    written; if a line is out of stock the earlier reservations are released and nothing is created.
+    With ``ORDER_TRANSACTIONS`` enabled the reservations and orders are written in one transaction.
+
+    Args:
+        data (dict): The request body: ``user_id``, ``items`` lines of ``id``/``shop_id``/``quantity``,
+            and the ``status``, ``address``, ``total`` and ``is_paid`` copied onto every order.
+        time (datetime): Placement time of the orders, now by default.
+
+    Returns:
+        list[Order]: The created orders.
+
+    Raises:
+        PlacementError: If the request is invalid, refers to unknown documents or is out of stock.
+    """
+    validate_order_request(data)
+    items = data.get('items')
+    time = time or datetime.now(timezone.utc)
+    status = data.get('status')
+    address = data.get('address')
+    total = data.get('total')
+    is_paid = data.get('is_paid')
+    # Retrieve the user
+    user = User.objects(id=data.get('user_id')).first()
+    if user is None:
+        raise PlacementError('User not found', 404)
+
+    # Fetch every item and shop in the cart once and keep them in request-local maps
+    items_by_id = {str(item.id): item for item in Item.objects(id__in=[item.get('id') for item in items])}
+    shops_by_id = {str(shop.id): shop for shop in Shop.objects(id__in=[item.get('shop_id') for item in items])}
+
+    for item in items:
+        if str(item.get('id')) not in items_by_id:
+            raise PlacementError('Item not found', 404)
+
+    # Group items by shop ID
+    items_by_shop = {}
+    for item in items:
+        item_shop_id = item.get('shop_id')
+        if str(item_shop_id) not in shops_by_id:
+            raise PlacementError('Shop not found', 404)
+
+        if item_shop_id not in items_by_shop:
+            items_by_shop[item_shop_id] = []
+        items_by_shop[item_shop_id].append(item)
+
+    def build_order(shop_id, shop_items):
+        return Order(user=user, shop=shops_by_id[str(shop_id)], items=shop_items, time=time, status=status, address=address, total=total, is_paid = is_paid)
+
+    place_orders = _place_orders_in_transaction if settings.ORDER_TRANSACTIONS else _place_orders
+    try:
+        orders = place_orders(items, items_by_shop, build_order)
+    except _OutOfStock:
+        raise PlacementError('Item is not enough', 400)
+    return orders
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+from .models import ShopDailySales
+
+
+def _contribution(order):
+    """Return ``((shop id, day), (orders, revenue, items sold))`` counted for ``order``, or None."""
+    shop_id = order._data.get('shop')
+    shop_id = getattr(shop_id, 'id', shop_id)
+    if shop_id is None or not isinstance(order.time, datetime):
+        # Orders without a time, or with a legacy string one, are left out like in the rebuild
+        return None
+    time = order.time.astimezone(timezone.utc) if order.time.tzinfo else order.time.replace(tzinfo=timezone.utc)
+    day = time.replace(hour=0, minute=0, second=0, microsecond=0)
+    items_sold = sum(line.get('quantity') or 0 for line in order.items or [])
+    return (shop_id, day), (1, float(order.total or 0), float(items_sold))
+
+
+def _apply(key, amounts, sign):
+    shop_id, day = key
+    orders, revenue, items_sold = amounts
+    ShopDailySales._get_collection().update_one(
+        {'shop': shop_id, 'day': day},
+        {'$inc': {'orders': sign * orders, 'revenue': sign * revenue, 'items_sold': sign * items_sold}},
+        upsert=True,
+    )
+
+
+def snapshot(order):
+    """Capture what ``order`` currently adds to the rollup, to pass to ``record_change`` after a write."""
+    return _contribution(order)
+
+
+def record_created(order):
+    """Add a newly written order to its shop's daily sales."""
+    contribution = _contribution(order)
+    if contribution:
+        _apply(*contribution, 1)
+
+
+def record_deleted(order):
+    """Take a deleted order out of its shop's daily sales."""
+    contribution = _contribution(order)
+    if contribution:
+        _apply(*contribution, -1)
+
+
+def record_change(before, order):
+    """Move an updated order's contribution from ``before`` (a ``snapshot``) to its current values."""
+    after = _contribution(order)
+    if before == after:
+        return
+    if before:
+        _apply(*before, -1)
+    if after:
+        _apply(*after, 1)
@@ -1,25 +1,140 @@
+from rest_framework import serializers
 from rest_framework_mongoengine.serializers import DocumentSerializer
-from .models import User, Item, Shop, Order, Category, Report, Review, Bill
+from utils.ImagePipeline import pick_variant
+from .models import User, Item, Shop, ShopSummary, Order, Category, Report, Review, Bill
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin taking a ``fields`` argument that trims the serializer down to those fields.
+
+    Listing views pair it with ``queryset.only(*projection(fields))`` so unrequested fields are
+    neither loaded from Mongo nor serialized.
+    """
+    # Serializer fields that read more than the model field of the same name
+    field_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """
+        Parse a comma separated ``?fields=`` value, always keeping ``id``.
+
+        Returns None when no fields were requested.
+
+        Raises:
+            ValueError: If a requested field does not exist on the model.
+        """
+        if not value:
+            return None
+        fields = [field.strip() for field in value.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in cls.Meta.model._fields]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+        return ['id'] + [field for field in fields if field != 'id']
+
+    @classmethod
+    def projection(cls, fields):
+        """Model fields to load so the serializer can render ``fields``."""
+        return [source for field in fields for source in cls.field_sources.get(field, (field,))]
 
 class UserSerializer(DocumentSerializer):
     class Meta:
         model = User
 
-class ShopSerializer(DocumentSerializer):
+class ShopSerializer(DynamicFieldsMixin, DocumentSerializer):
+    items = serializers.SerializerMethodField()
+
     class Meta:
         model = Shop
+
+    def get_items(self, shop):
+        return [str(item_id) for item_id in shop.item_ids()]
  
-class ItemSerializer(DocumentSerializer):
-    shop = ShopSerializer()
+class ItemSerializer(DynamicFieldsMixin, DocumentSerializer):
+    shop = serializers.SerializerMethodField()
+    field_sources = {'shop': ('shop', 'shop_summary'), 'image': ('image', 'image_variants')}
+
     class Meta:
         model = Item
+        exclude = ('shop_summary', 'image_variants')
 
-class OrderSerializer(DocumentSerializer):
+    def to_representation(self, item):
+        data = super().to_representation(item)
+        request = self.context.get('request')
+        if 'image' in data and request is not None:
+            # ?image_width= asks for the smallest stored variant covering that width
+            try:
+                width = int(request.query_params.get('image_width', 0))
+            except ValueError:
+                width = 0
+            data['image'] = pick_variant(item.image_variants, width, data['image'])
+        return data
+
+    def get_shop(self, item):
+        # Serialize from the embedded snapshot; only items saved before it existed dereference the shop
+        summary = item.shop_summary or (item.shop and ShopSummary.from_shop(item.shop))
+        if not summary:
+            return None
+        return {'id': str(summary.id), 'name': summary.name, 'hotline': summary.hotline}
+
+class OrderSerializer(DynamicFieldsMixin, DocumentSerializer):
     user = UserSerializer()
     shop = ShopSerializer()
     class Meta:
         model = Order
 
+def _reference_id(document, field_name):
+    """Id stored in a reference field, read without dereferencing it."""
+    value = document._data.get(field_name)
+    return getattr(value, 'id', value)
+
+class OrderSummaryListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Two queries for the whole page instead of dereferencing every order's user and shop
+        orders = list(data)
+        self.child.names = {
+            field_name: {
+                str(document.id): document.name
+                for document in model.objects(id__in={_reference_id(order, field_name) for order in orders}).only('name')
+            }
+            for field_name, model in (('user', User), ('shop', Shop))
+            if field_name in self.child.fields
+        }
+        return super().to_representation(orders)
+
+class OrderSummarySerializer(DynamicFieldsMixin, DocumentSerializer):
+    """Compact order whose user and shop are ``{id, name}`` summaries instead of full nested documents."""
+    user = serializers.SerializerMethodField()
+    shop = serializers.SerializerMethodField()
+    names = None
+
+    class Meta:
+        model = Order
+        list_serializer_class = OrderSummaryListSerializer
+
+    def get_user(self, order):
+        return self._summary(order, 'user', User)
+
+    def get_shop(self, order):
+        return self._summary(order, 'shop', Shop)
+
+    def _summary(self, order, field_name, model):
+        reference_id = _reference_id(order, field_name)
+        if reference_id is None:
+            return None
+        if self.names is not None:
+            name = self.names[field_name].get(str(reference_id))
+        else:
+            document = model.objects(id=reference_id).only('name').first()
+            name = document and document.name
+        return {'id': str(reference_id), 'name': name}
+
 class CategorySerializer(DocumentSerializer):
     class Meta:
         model = Category
@@ -1,3 +1,473 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from pymongo import MongoClient, monitoring
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from utils.CustomPagination import CustomCursorPagination
+from utils.ImageUploader import ImageUploader, UploadError
+from utils.SearchEngine import SearchEngine, IndexNotReady
+
+# Tests touching MongoDB run against this server in a scratch database, never against MONGO_URL
+TEST_MONGO_URL = os.getenv('TEST_MONGO_URL')
+TEST_DB_NAME = 'uitcommerce_test'
+
+
+def _mongo_hello():
+    if not TEST_MONGO_URL:
+        return None
+    try:
+        return MongoClient(TEST_MONGO_URL, serverSelectionTimeoutMS=2000).admin.command('hello')
+    except Exception:
+        return None
+
+
+_hello = _mongo_hello()
+requires_mongo = skipUnless(_hello, 'TEST_MONGO_URL does not point to a reachable MongoDB')
+# Transactions need a replica set; see "Transactional order placement" in the README for a local one
+requires_replica_set = skipUnless(_hello and 'setName' in _hello, 'TEST_MONGO_URL does not point to a replica set')
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Record the name of every command sent to the server, to count queries per request."""
+
+    def __init__(self):
+        self.commands = []
+
+    def count(self, name):
+        return self.commands.count(name)
+
+    def started(self, event):
+        self.commands.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+commands = CommandCounter()
+
+
+class MongoTestCase(SimpleTestCase):
+    """Connect the documents to the scratch database and empty it after every test."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # api.config connects to MONGO_URL when imported, and load_dotenv keeps a variable already set
+        os.environ['MONGO_URL'] = TEST_MONGO_URL
+        from mongoengine import connect, disconnect
+        from api import config  # noqa: F401
+        disconnect()
+        cls.db = connect(db=TEST_DB_NAME, host=TEST_MONGO_URL, tz_aware=True, event_listeners=[commands])[TEST_DB_NAME]
+
+    def tearDown(self):
+        for name in self.db.list_collection_names():
+            self.db.drop_collection(name)
+        super().tearDown()
+
+
+class FakeCloudinary:
+    """Local stand-in for ``cloudinary.uploader``: records uploads and destroyed assets."""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = failing
+        self.uploaded = []
+        self.destroyed = []
+        self._lock = threading.Lock()
+
+    def upload(self, file, timeout=None):
+        name = getattr(file, 'name', file)
+        time.sleep(self.delays.get(name, 0))
+        if name in self.failing:
+            raise ConnectionError(f'Cannot upload {name}')
+        with self._lock:
+            self.uploaded.append(name)
+        return {'secure_url': f'https://cdn.example.com/{name}', 'public_id': name}
+
+    def destroy(self, public_id):
+        with self._lock:
+            self.destroyed.append(public_id)
+
+
+def _png(name, width=800, height=600):
+    body = BytesIO()
+    Image.new('RGB', (width, height), (200, 80, 40)).save(body, 'PNG')
+    return SimpleUploadedFile(name, body.getvalue(), content_type='image/png')
+
+
+class ImageUploaderTests(SimpleTestCase):
+    def test_results_keep_input_order(self):
+        cloudinary = FakeCloudinary(delays={'a': 0.1})
+        uploader = ImageUploader(cloudinary.upload, cloudinary.destroy, max_workers=3)
+
+        results = uploader.upload_all(['a', 'b', 'c'])
+
+        self.assertEqual([result['public_id'] for result in results], ['a', 'b', 'c'])
+        self.assertEqual(cloudinary.destroyed, [])
+
+    def test_failure_destroys_the_other_uploads(self):
+        cloudinary = FakeCloudinary(delays={'b': 0.1, 'c': 0.3}, failing=('b',))
+        uploader = ImageUploader(cloudinary.upload, cloudinary.destroy, max_workers=3)
+
+        with self.assertRaisesRegex(UploadError, 'Image upload failed'):
+            uploader.upload_all(['a', 'b', 'c'])
+        time.sleep(0.4)  # 'c' finishes after the failure and is destroyed by its callback
+
+        self.assertCountEqual(cloudinary.uploaded, ['a', 'c'])
+        self.assertCountEqual(cloudinary.destroyed, ['a', 'c'])
+
+    def test_timeout_destroys_late_uploads(self):
+        cloudinary = FakeCloudinary(delays={'slow': 0.5})
+        uploader = ImageUploader(cloudinary.upload, cloudinary.destroy, max_workers=2, timeout=0.1)
+
+        with self.assertRaisesRegex(UploadError, 'timed out'):
+            uploader.upload_all(['fast', 'slow'])
+        time.sleep(0.6)
+
+        self.assertCountEqual(cloudinary.destroyed, ['fast', 'slow'])
+
+
+class CursorPaginationTests(SimpleTestCase):
+    item_id = '65f000000000000000000001'
+
+    def _decode(self, ordering, position):
+        from api.models import Item
+
+        token = base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+        request = Request(APIRequestFactory().get('/api/items/get_all_items', {'ordering': ordering, 'cursor': token}))
+        paginator = CustomCursorPagination()
+        paginator.ordering_fields = ('price',)
+        paginator.sort_field, paginator.descending = paginator.get_ordering(request)
+        return paginator.decode_cursor(request, Item)
+
+    def test_decodes_boundary_value_with_the_sort_field(self):
+        cursor = self._decode('price', {'id': self.item_id, 'v': '12.5', 'r': 0})
+        self.assertEqual(cursor, {'id': self.item_id, 'v': Decimal('12.50'), 'r': False})
+
+    def test_tampered_cursor_is_not_found(self):
+        for ordering, position in (
+            ('-id', {'id': 'bad', 'r': 0}),
+            ('price', {'id': self.item_id, 'v': 'abc', 'r': 0}),
+            ('price', {'id': self.item_id, 'v': 'Infinity', 'r': 0}),
+            ('price', {'id': self.item_id, 'r': 0}),
+        ):
+            with self.subTest(position=position), self.assertRaisesMessage(NotFound, 'Invalid cursor'):
+                self._decode(ordering, position)
+
+
+class SearchEngineTests(SimpleTestCase):
+    def _blocked_engine(self):
+        release = threading.Event()
+
+        def loader():
+            release.wait(5)
+            return [('a', 'áo thun cotton'), ('b', 'quần jean')]
+
+        return SearchEngine(loader=loader), release
+
+    def _wait_until_ready(self, engine):
+        for _ in range(100):
+            if engine.ensure_built():
+                return
+            time.sleep(0.02)
+        self.fail('The search index was never built')
+
+    def test_first_build_runs_in_the_background(self):
+        engine, release = self._blocked_engine()
+
+        self.assertFalse(engine.ensure_built())
+        with self.assertRaises(IndexNotReady):
+            engine.search('áo')
+        engine.add('c', 'áo sơ mi')  # Written during the build, replayed onto the new index
+        release.set()
+        self._wait_until_ready(engine)
+
+        self.assertCountEqual([key for key, _ in engine.search('ao')], ['a', 'c'])
+        self.assertEqual([key for key, _ in engine.search('jean')], ['b'])
+
+    def test_search_view_answers_503_until_built(self):
+        from api.views import item as item_views
+
+        engine, release = self._blocked_engine()
+        self.addCleanup(release.set)
+        request = APIRequestFactory().get('/api/items/search', {'q': 'áo'})
+
+        with mock.patch.object(item_views, 'search_engine', engine):
+            response = item_views.search_items(request)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(item_views.SEARCH_RETRY_AFTER))
+
+
+class ItemFilterTests(SimpleTestCase):
+    def test_price_bounds_must_be_finite(self):
+        from api.views.item import _item_filters
+
+        self.assertEqual(_item_filters({'min_price': '10', 'max_price': '20.5'}), {'price__gte': Decimal('10'), 'price__lte': Decimal('20.5')})
+        for value in ('abc', 'NaN', 'Infinity', '-inf', '1e9999999'):
+            with self.subTest(value=value), self.assertRaisesMessage(ValueError, 'Invalid min_price value'):
+                _item_filters({'min_price': value})
+
+
+@requires_mongo
+class CreateItemTests(MongoTestCase):
+    def setUp(self):
+        from api.models import Shop
+        from api.views import item as item_views
+
+        self.shop = Shop(name='Test shop', email='shop@example.com', password='-').save()
+        self.cloudinary = FakeCloudinary()
+        uploader = ImageUploader(self.cloudinary.upload, self.cloudinary.destroy)
+        patcher = mock.patch.object(item_views, 'image_uploader', uploader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.create_item = item_views.create_item
+
+    def _post(self, **overrides):
+        data = {
+            'name': 'Áo thun', 'price': '120000', 'discount': '10', 'quantity': '5', 'description': 'Cotton',
+            'colors': 'Đen, Trắng', 'sizes': 'S, M', 'category': 'Áo',
+            'image': _png('main.png'), 'detail_image[0]': _png('detail.png'),
+        }
+        data.update(overrides)
+        request = APIRequestFactory().post(f'/api/items/create/{self.shop.id}', data, format='multipart')
+        return self.create_item(request, str(self.shop.id))
+
+    def test_creates_item_with_uploaded_images(self):
+        from api.models import Item
+
+        response = self._post()
+
+        self.assertEqual(response.status_code, 201, response.data)
+        item = Item.objects.get(shop=self.shop.id)
+        self.assertEqual(item.image, 'https://cdn.example.com/main.png')
+        self.assertEqual(item.detail_image, ['https://cdn.example.com/detail.png'])
+        self.assertEqual(set(item.image_variants), {'120', '360', '720'})
+        self.assertEqual(self.cloudinary.destroyed, [])
+
+    def test_invalid_request_uploads_nothing(self):
+        response = self._post(price='NaN')
+        self.assertEqual(response.status_code, 400)
+        response = self._post(quantity='-1')
+        self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(self.cloudinary.uploaded, [])
+
+    def test_failed_save_discards_uploads(self):
+        from api.models import Item
+
+        with mock.patch.object(Item, 'save', side_effect=RuntimeError('Write failed')):
+            response = self._post()
+
+        self.assertEqual(response.status_code, 500)
+        self.assertTrue(self.cloudinary.uploaded)
+        self.assertCountEqual(self.cloudinary.destroyed, self.cloudinary.uploaded)
+
+
+@requires_mongo
+class PlaceOrderTests(MongoTestCase):
+    def setUp(self):
+        from api.models import User, Shop
+
+        self.user = User(name='Buyer', email='buyer@example.com', password='-').save()
+        self.shop = Shop(name='Test shop', email='shop@example.com', password='-').save()
+
+    def _item(self, quantity, shop=None):
+        from api.models import Item
+
+        return Item(
+            name='Áo thun', price=100, discount=0, quantity=quantity, description='Cotton', category='Áo',
+            image='https://cdn.example.com/main.png', shop=shop or self.shop,
+        ).save()
+
+    def _order(self, *lines):
+        return {
+            'user_id': str(self.user.id),
+            'items': [{'id': str(item.id), 'shop_id': str(item.shop.id), 'quantity': quantity} for item, quantity in lines],
+            'status': 'pending', 'address': 'Thủ Đức', 'total': 100, 'is_paid': False,
+        }
+
+    def test_concurrent_orders_never_oversell(self):
+        from api.models import Item, Order
+        from api.placement import PlacementError, place_order
+
+        stock = 50
+        item = self._item(stock)
+        start = threading.Barrier(16)
+        placed = []
+        errors = []
+
+        def buy(quantity):
+            start.wait()
+            while True:
+                try:
+                    place_order(self._order((item, quantity)))
+                except PlacementError as e:
+                    if e.message != 'Item is not enough':
+                        errors.append(e.message)
+                    return
+                except Exception as e:
+                    errors.append(repr(e))
+                    return
+                placed.append(quantity)
+
+        threads = [threading.Thread(target=buy, args=(1 + number % 3,)) for number in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        remaining = Item.objects.get(id=item.id).quantity
+        self.assertGreaterEqual(remaining, 0)
+        self.assertEqual(remaining, 0)  # Threads buying one at a time only stop once the stock is gone
+        self.assertEqual(sum(placed), stock)
+        self.assertEqual(Order.objects(shop=self.shop.id).count(), len(placed))
+
+    def test_cart_reads_each_collection_once(self):
+        from api.models import Shop, Order
+        from api.placement import place_order
+
+        shops = [self.shop] + [Shop(name=f'Shop {number}', email=f'shop{number}@example.com', password='-').save() for number in range(2)]
+        lines = [(self._item(10, shop=shops[number % 3]), 1) for number in range(30)]
+
+        commands.commands.clear()
+        place_order(self._order(*lines))
+
+        # The user, then every item and every shop of the cart in one query each
+        self.assertEqual(commands.count('find'), 3)
+        self.assertEqual(Order.objects.count(), 3)
+
+
+@requires_replica_set
+@override_settings(ORDER_TRANSACTIONS=True)
+class TransactionalPlaceOrderTests(PlaceOrderTests):
+    """Rerun the placement tests through ``_place_orders_in_transaction``."""
+
+    def setUp(self):
+        from api.models import Item, Order
+
+        super().setUp()
+        # Collections are dropped after every test; create them outside any transaction
+        Item.ensure_indexes()
+        Order.ensure_indexes()
+
+    def test_transient_error_retries_the_whole_placement(self):
+        from pymongo.errors import OperationFailure
+        from api.models import Item, Order, Shop
+        from api.placement import place_order
+
+        other_shop = Shop(name='Other shop', email='other@example.com', password='-').save()
+        first, second = self._item(10), self._item(10, shop=other_shop)
+        validate = Order.validate
+        attempts = []
+
+        def fail_first_attempt(order, *args, **kwargs):
+            # Raised after the stock updates of the attempt, so the abort has to undo them
+            attempts.append(order.shop.id)
+            if len(attempts) == 1:
+                raise OperationFailure('Injected write conflict', code=112, details={'errorLabels': ['TransientTransactionError']})
+            return validate(order, *args, **kwargs)
+
+        with mock.patch.object(Order, 'validate', fail_first_attempt):
+            orders = place_order(self._order((first, 2), (second, 3)))
+
+        self.assertEqual(len(attempts), 3)  # One failed attempt, then one validation per shop
+        self.assertEqual(len(orders), 2)
+        self.assertEqual(Item.objects.get(id=first.id).quantity, 8)
+        self.assertEqual(Item.objects.get(id=second.id).quantity, 7)
+        self.assertEqual(Order.objects(shop=self.shop.id).count(), 1)
+        self.assertEqual(Order.objects(shop=other_shop.id).count(), 1)
+
+
+async def _next_event(stream, timeout=5):
+    """Return the next ``{'id', 'event', 'data'}`` of an SSE stream, skipping comments and ``retry``."""
+    async def read():
+        async for chunk in stream:
+            fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n') if not line.startswith((':', 'retry')))
+            if fields:
+                return {'id': fields.get('id'), 'event': fields['event'], 'data': json.loads(fields['data'])}
+    return await asyncio.wait_for(read(), timeout)
+
+
+@requires_mongo
+@override_settings(ORDER_FEED_CHANGE_STREAMS=False)
+class OrderFeedPollingTests(MongoTestCase):
+    def setUp(self):
+        from api.models import User, Shop
+
+        self.user = User(name='Buyer', email='buyer@example.com', password='-').save()
+        self.shop = Shop(name='Test shop', email='shop@example.com', password='-').save()
+
+    def _order(self):
+        from api.models import Order
+
+        order = Order(user=self.user, shop=self.shop, items=[], status='pending', total=100, is_paid=False).save()
+        return Order.objects.get(id=order.id)  # updated_at as stored, at millisecond precision
+
+    def _feed(self, last_event_id=None):
+        from api.order_feed import OrderFeed
+
+        return OrderFeed(str(self.shop.id), last_event_id=last_event_id, poll_interval=0.05).stream()
+
+    def test_reports_new_orders_and_status_changes(self):
+        async def scenario():
+            stream = self._feed()
+            # Let the feed take its starting position before anything is written
+            pending = asyncio.ensure_future(_next_event(stream))
+            await asyncio.sleep(0.3)
+            order = self._order()
+            created = await pending
+
+            order.status = 'shipped'
+            order.save()
+            changed = await _next_event(stream)
+            await stream.aclose()
+            return order, created, changed
+
+        order, created, changed = asyncio.run(scenario())
+
+        self.assertEqual((created['event'], created['data']['id'], created['data']['status']), ('order', str(order.id), 'pending'))
+        self.assertEqual((changed['event'], changed['data']['id'], changed['data']['status']), ('order', str(order.id), 'shipped'))
+        self.assertTrue(changed['id'].startswith('p.'))
+
+    def test_resuming_skips_events_already_seen(self):
+        seen = self._order()
+        time.sleep(0.01)
+        missed = self._order()
+
+        async def scenario():
+            stream = self._feed(last_event_id=f'p.{seen.updated_at.isoformat()}|{seen.id}')
+            event = await _next_event(stream)
+            await stream.aclose()
+            return event
+
+        event = asyncio.run(scenario())
+
+        self.assertEqual((event['event'], event['data']['id']), ('order', str(missed.id)))
+        self.assertEqual(event['id'], f'p.{missed.updated_at.isoformat()}|{missed.id}')
+
+    def test_malformed_resume_id_resets(self):
+        async def scenario():
+            stream = self._feed(last_event_id='p.yesterday|not-an-id')
+            event = await _next_event(stream)
+            await stream.aclose()
+            return event
+
+        self.assertEqual(asyncio.run(scenario())['event'], 'reset')
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import auth, item, shop, review, report, bill, order, category, payment
+from .views import auth, item, shop, review, report, bill, order, category, payment, cache
 urlpatterns = [
     # Region create auth routers
     path('payment', payment.payment_view, name='payment'),
@@ -13,12 +13,15 @@ urlpatterns = [
     path('items/update_item/<str:id>', item.update_item, name='update_item'),
     path('items/delete_item/<str:id>', item.delete_item, name='delete_item'),
     path('items/get_all_items', item.get_all_items, name='get_all_items'),
+    path('items/search', item.search_items, name='search_items'),
+    path('items/import/<str:shop_id>', item.import_items, name='import_items'),
+    path('items/bulk_update', item.bulk_update_items, name='bulk_update_items'),
     path('items/check_item_bought/<str:user_id>/<str:item_id>', item.check_item_bought, name='check_item_bought'),
 
     # Region create shop routers
     path('auth/create_shop', shop.create_shop, name='create_shop'),
     path('auth/login_shop', shop.login_shop, name='login_shop'),
-    path('shops/update_shop', shop.update_shop, name='update_shop'),
+    path('shops/update_shop/<str:shop_id>', shop.update_shop, name='update_shop'),
     path('shops/delete_shop/<str:id>', shop.delete_shop, name='delete_shop'),
     path('items/get_all_shop_items/<str:id>', shop.get_all_shop_items, name='get_all_shop_items'),
     path('shops/get_list_customers/<str:id>', shop.get_list_customers, name='get_list_customer'),
@@ -55,8 +58,15 @@ urlpatterns = [
 
     # Region create order routers
     path('orders/create_order', order.create_order, name='create_order'),
+    path('orders/intake', order.queue_order, name='queue_order'),
+    path('orders/intake/<str:id>', order.get_order_intake, name='get_order_intake'),
     path('orders/update_order/<str:id>', order.update_order, name='update_order'),
-    path('orders/delete_order/<str:id>', order.delete_order, name='delete_order'),
+    path('orders/bulk_update_status/<str:shop_id>', order.bulk_update_order_status, name='bulk_update_order_status'),
+    path('orders/delete_order/<str:order_id>', order.delete_order, name='delete_order'),
     path('orders/get_user_orders/<str:id>', order.get_user_orders, name='get_user_orders'),
     path('orders/get_shop_orders/<str:id>', order.get_shop_orders, name='get_shop_orders'),
+    path('orders/feed/<str:id>', order.stream_shop_orders, name='stream_shop_orders'),
+
+    # Region create cache routers
+    path('cache/stats', cache.get_cache_stats, name='get_cache_stats'),
 ]
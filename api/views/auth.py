@@ -3,10 +3,10 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.forms.models import model_to_dict
 from ..serializers import UserSerializer
-import cloudinary
-import cloudinary.uploader
 from ..models import User
 from ..config import *
+from ..media import image_uploader, image_pipeline
+from utils.ImageUploader import UploadError
 import bcrypt
 
 
@@ -51,6 +51,7 @@ def update_user(request, id):
     Required PUT parameters:
     - Any field(s) that need to be updated, except 'id'.
     - If the 'picture' field is provided, it will be uploaded to Cloudinary and the URL will be stored in 'profile_picture' field of the user.
+      Resized WebP variants of an uploaded picture are rendered and uploaded alongside it, and their URLs stored in 'profile_picture_variants'.
 
     Returns:
     Response: The HTTP response indicating the success or failure of the operation.
@@ -67,10 +68,11 @@ def update_user(request, id):
             if key == 'id':
                 continue
             if key == 'picture':
-                # Upload the picture to Cloudinary and get the URL
-                upload_result = cloudinary.uploader.upload(value)
-                profile_picture_url = upload_result['secure_url']
-                setattr(user, 'profile_picture', profile_picture_url)
+                # Render the resized variants of an uploaded file, then upload everything to Cloudinary concurrently
+                variants = image_pipeline.render(value) if hasattr(value, 'read') else {}
+                uploads = image_uploader.upload_all([value] + list(variants.values()))
+                setattr(user, 'profile_picture', uploads[0]['secure_url'])
+                setattr(user, 'profile_picture_variants', {str(width): upload['secure_url'] for width, upload in zip(variants, uploads[1:])})
             else:
                 setattr(user, key, value)
 
@@ -81,6 +83,12 @@ def update_user(request, id):
     except User.DoesNotExist:
         return Response({'success': False, 'message': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
+    except ValueError as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    except UploadError as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+
     except Exception as e:
         return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -0,0 +1,18 @@
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework import status
+from ..cache import catalog_cache
+
+@api_view(['GET'])
+def get_cache_stats(request):
+    """
+    Retrieve the hit and miss counters of this worker's catalog cache.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response containing the cache statistics.
+
+    """
+    return Response({'success': True, 'message': 'Cache statistics retrieved successfully', 'data': catalog_cache.stats()}, status=status.HTTP_200_OK)
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from ..models import Category
 from ..serializers import CategorySerializer
+from ..cache import catalog_cache, cached_json_response
 
 @api_view(['POST'])
 def create_category(request):
@@ -29,6 +30,7 @@ def create_category(request):
     try:
         category = Category(**data)
         category.save()
+        catalog_cache.bump('categories')
         serializer = CategorySerializer(category)
         return Response({'success': True, 'message': 'Category created successfully', 'data': serializer.data}, status=status.HTTP_201_CREATED)
     except Exception as e:
@@ -40,6 +42,8 @@ def get_all_categories(request):
     """
     Retrieve all categories.
 
+    Responses are served from ``catalog_cache``, with ETag revalidation, until a category write.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
@@ -50,10 +54,12 @@ def get_all_categories(request):
         Exception: If any error occurs while retrieving the categories.
 
     """
+    def build_response_data():
+        serializer = CategorySerializer(Category.objects.all(), many=True)
+        return {'success': True, 'message': 'Categories retrieved successfully', 'data': serializer.data}
+
     try:
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response({'success': True, 'message': 'Categories retrieved successfully', 'data': serializer.data})
+        return cached_json_response(request, ('categories',), build_response_data)
     except Exception as e:
         return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -63,6 +69,8 @@ def get_category(request, id):
     """
     Retrieve a specific category by its ID.
 
+    Responses are served from ``catalog_cache``, with ETag revalidation, until a category write.
+
     Args:
         request (HttpRequest): The HTTP request object.
         id (int): The ID of the category to retrieve.
@@ -75,10 +83,12 @@ def get_category(request, id):
         Exception: If any error occurs while retrieving the category.
 
     """
+    def build_response_data():
+        serializer = CategorySerializer(Category.objects.get(id=id))
+        return {'success': True, 'message': 'Category retrieved successfully', 'data': serializer.data}
+
     try:
-        category = Category.objects.get(id=id)
-        serializer = CategorySerializer(category)
-        return Response({'success': True, 'message': 'Category retrieved successfully', 'data': serializer.data})
+        return cached_json_response(request, ('categories',), build_response_data)
     except Category.DoesNotExist:
         return Response({'success': False, 'message': 'Category not found'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -113,6 +123,7 @@ def update_category(request, id):
         category = Category.objects.get(id=id)
         category.name = data['name']
         category.save()
+        catalog_cache.bump('categories')
         serializer = CategorySerializer(category)
         return Response({'success': True, 'message': 'Category updated successfully', 'data': serializer.data})
     except Category.DoesNotExist:
@@ -141,6 +152,7 @@ def delete_category(request, id):
     try:
         category = Category.objects.get(id=id)
         category.delete()
+        catalog_cache.bump('categories')
         return Response({'success': True, 'message': 'Category deleted successfully'})
     except Category.DoesNotExist:
         return Response({'success': False, 'message': 'Category not found'}, status=status.HTTP_404_NOT_FOUND)
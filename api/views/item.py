@@ -1,12 +1,123 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from ..models import Item, Shop, User, Order
-import cloudinary
-import cloudinary.uploader
+from rest_framework.exceptions import NotFound
+from ..models import Item, Shop, ShopSummary, User, Order
 from ..serializers import ItemSerializer
-from decimal import Decimal
-from utils.CustomPagination import CustomPagination
+from ..cache import catalog_cache, cached_json_response
+from django.conf import settings
+from decimal import Decimal, InvalidOperation
+from bson import ObjectId
+from mongoengine import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+import codecs
+import csv
+import json
+from utils.CustomPagination import CustomPagination, get_paginator
+from utils.SearchEngine import SearchEngine, IndexNotReady
+from utils.ImageUploader import UploadError
+from ..media import image_uploader, image_pipeline
+
+ITEM_ORDERING_FIELDS = ('price', 'discount', 'quantity', 'name')
+ITEM_FACET_FIELDS = ('category', 'colors', 'sizes')
+IMPORT_BATCH_SIZE = 1000
+IMPORT_REQUIRED_FIELDS = ('name', 'price', 'discount', 'quantity', 'description', 'category')
+BULK_UPDATE_FIELDS = ('price', 'discount', 'quantity', 'active')
+BULK_UPDATE_MAX_PATCHES = 10000
+# Only this many best matches are ranked, counted and paginated by search_items
+SEARCH_RESULT_LIMIT = 1000
+# Seconds search_items asks clients to wait while the search index is still being built
+SEARCH_RETRY_AFTER = 5
+
+
+def _item_filters(params):
+    """
+    Build the queryset filters for the catalog listing from the request query parameters.
+
+    ``colors`` and ``sizes`` take comma separated values and match items having any of them.
+
+    Raises:
+        ValueError: If a price, ``active`` or ``shop`` value cannot be parsed.
+    """
+    filters = {}
+    if params.get('category'):
+        filters['category'] = params['category']
+    for param, lookup in (('min_price', 'price__gte'), ('max_price', 'price__lte')):
+        if params.get(param):
+            try:
+                value = Decimal(params[param])
+                # Rounds to the price precision like the query will, which overflows for huge exponents
+                Item._fields['price'].to_python(value)
+            except InvalidOperation:
+                raise ValueError(f'Invalid {param} value')
+            if not value.is_finite():
+                raise ValueError(f'Invalid {param} value')
+            filters[lookup] = value
+    for field in ('colors', 'sizes'):
+        if params.get(field):
+            filters[f'{field}__in'] = [value.strip() for value in params[field].split(',') if value.strip()]
+    if params.get('active'):
+        if params['active'].lower() not in ('true', 'false', '1', '0'):
+            raise ValueError('Invalid active value')
+        filters['active'] = params['active'].lower() in ('true', '1')
+    if params.get('shop'):
+        if not ObjectId.is_valid(params['shop']):
+            raise ValueError('Invalid shop id')
+        filters['shop'] = ObjectId(params['shop'])
+    return filters
+
+
+def _item_facets(items):
+    """Count the filtered items per category, color and size in a single ``$facet`` aggregation."""
+    def count_by(field):
+        return [{'$group': {'_id': f'${field}', 'count': {'$sum': 1}}}, {'$sort': {'count': -1, '_id': 1}}]
+
+    pipeline = [{'$facet': {
+        'category': count_by('category'),
+        'colors': [{'$unwind': '$colors'}] + count_by('colors'),
+        'sizes': [{'$unwind': '$sizes'}] + count_by('sizes'),
+    }}]
+    result = next(items.aggregate(pipeline), {})
+    return {
+        field: [{'value': bucket['_id'], 'count': bucket['count']} for bucket in result.get(field, [])]
+        for field in ITEM_FACET_FIELDS
+    }
+
+
+def _search_text(name, description, category):
+    return ' '.join(part for part in (name, category, description) if part)
+
+
+def _search_documents():
+    items = Item.objects(active=True).only('name', 'description', 'category').as_pymongo().no_cache()
+    return ((str(item['_id']), _search_text(item.get('name'), item.get('description'), item.get('category'))) for item in items)
+
+
+def _link_shop_items(shop_id, item_ids):
+    # Atomic $push, so concurrent creates never load or overwrite the shop's item list
+    if settings.SHOP_ITEMS_STORED and item_ids:
+        Shop.objects(id=shop_id).update_one(push_all__items=item_ids)
+
+
+def _unlink_shop_item(shop_id, item_id):
+    if settings.SHOP_ITEMS_STORED:
+        Shop.objects(id=shop_id).update_one(pull__items=item_id)
+
+
+# Per-process product index, kept in sync by the item write views below
+search_engine = SearchEngine(loader=_search_documents)
+if settings.SEARCH_INDEX_PRELOAD:
+    # Load on a background thread now, so no search request has to wait for the first build
+    search_engine.ensure_built()
+
+
+def _index_item(item):
+    if item.active:
+        search_engine.add(str(item.id), _search_text(item.name, item.description, item.category))
+    else:
+        search_engine.remove(str(item.id))
+
 
 @api_view(['POST'])
 def create_item(request, shop_id):
@@ -28,7 +139,7 @@ def create_item(request, shop_id):
     data = request.data
 
     try:
-        shop = Shop.objects.get(id=shop_id)
+        shop = Shop.objects.only('name', 'hotline').get(id=shop_id)
         required_fields = ['name', 'price', 'discount', 'quantity', 'description', 'colors', 'sizes', 'category']
         missing_fields = [field for field in required_fields if field not in data]
 
@@ -40,26 +151,15 @@ def create_item(request, shop_id):
             price = Decimal(data['price'])
             discount = Decimal(data['discount'])
             quantity = Decimal(data['quantity'])
-        except (ValueError, TypeError, Decimal.InvalidOperation):
+        except (ValueError, TypeError, InvalidOperation):
             return Response({'success': False, 'message': 'Invalid decimal values'}, status=status.HTTP_400_BAD_REQUEST)
-    
-        # Handle main image upload to Cloudinary
-        image_file = request.FILES.get('image')
-
-        if image_file:
-            uploaded_image = cloudinary.uploader.upload(image_file)
-            image_url = uploaded_image['secure_url']
-        else:
-            image_url = ''
+        if not all(value.is_finite() for value in (price, discount, quantity)):
+            return Response({'success': False, 'message': 'Invalid decimal values'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(data['colors'], str) or not isinstance(data['sizes'], str):
+            return Response({'success': False, 'message': 'colors and sizes must be comma separated values'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Handle detail images upload to Cloudinary
+        image_file = request.FILES.get('image')
         detail_images = [request.FILES.get(f'detail_image[{index}]') for index in range(len(request.FILES)) if f'detail_image[{index}]' in request.FILES]
-        print(detail_images)
-        uploaded_detail_images = []
-        for detail_image_file in detail_images:
-            uploaded_detail_image = cloudinary.uploader.upload(detail_image_file)
-            uploaded_detail_images.append(uploaded_detail_image['secure_url'])
-
         item_data = {
             'name': data['name'],
             'price': price,
@@ -69,21 +169,47 @@ def create_item(request, shop_id):
             'colors': [colors.strip() for colors in data['colors'].split(',')],
             'sizes': [sizes.strip() for sizes in data['sizes'].split(',')],  # Convert to list
             'category': data['category'],
-            'image': image_url,
-            'detail_image': uploaded_detail_images,
+            'image': '',
+            'detail_image': [],
             'shop': str(shop.id),  # Convert Shop object to its ID
             'active': True
         }
-    
-        item = Item(**item_data)
-  
-        item.save()
- 
 
-        shop.items.append(item)
-   
-        shop.save()
-   
+        # Validate everything but the image URLs before uploading, so a bad request never leaves
+        # assets on Cloudinary
+        item = Item(**item_data, shop_summary=ShopSummary.from_shop(shop))
+        try:
+            item.validate()
+        except ValidationError as e:
+            errors = {field: error for field, error in e.to_dict().items() if not (field == 'image' and image_file)}
+            if errors:
+                message = '; '.join(f'{field}: {error}' for field, error in errors.items())
+                return Response({'success': False, 'message': message}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Render the listing variants of the main image, then upload everything to Cloudinary concurrently
+        try:
+            variants = image_pipeline.render(image_file) if image_file else {}
+        except ValueError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        main_images = [image_file] if image_file else []
+        try:
+            uploads = image_uploader.upload_all(main_images + detail_images + list(variants.values()))
+        except UploadError as e:
+            return Response({'success': False, 'message': str(e)}, status=status.HTTP_502_BAD_GATEWAY)
+        try:
+            item_data['image'] = uploads[0]['secure_url'] if image_file else ''
+            item_data['detail_image'] = [upload['secure_url'] for upload in uploads[len(main_images):len(main_images) + len(detail_images)]]
+            item.image = item_data['image']
+            item.detail_image = item_data['detail_image']
+            item.image_variants = {str(width): upload['secure_url'] for width, upload in zip(variants, uploads[len(main_images) + len(detail_images):])}
+            item.save()
+        except Exception:
+            # Don't leave orphaned assets on Cloudinary when the item can't be stored
+            image_uploader.discard(uploads)
+            raise
+        _index_item(item)
+        catalog_cache.bump('items')
+        _link_shop_items(shop.id, [item.id])
 
         item_data['image'] = str(item_data['image'])
         item_data['detail_image'] = [str(image) for image in item_data['detail_image']]
@@ -138,6 +264,8 @@ def update_item(request, id):
         item.active = data['active']
 
     item.save()
+    _index_item(item)
+    catalog_cache.bump('items')
     return Response({'success': True, 'message': 'Item updated successfully'}, status=status.HTTP_200_OK)
 
 
@@ -159,11 +287,12 @@ def delete_item(request, id):
 
     """
     try:
-        item = Item.objects.get(id=id)
-        shop = item.shop
+        item = Item.objects.no_dereference().only('shop').get(id=id)
         item.delete()
-        shop.items.remove(item)
-        shop.save()
+        search_engine.remove(str(item.id))
+        catalog_cache.bump('items')
+        if item.shop is not None:
+            _unlink_shop_item(item.shop.id, item.id)
         return Response({'success': True, 'message': 'Item deleted successfully'}, status=status.HTTP_200_OK)
     except Item.DoesNotExist:
         return Response({'success': False, 'message': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -208,6 +337,18 @@ def get_all_items(request):
     """
     Get all items.
 
+    Supports page-number pagination (``?page=``) and keyset pagination (``?pagination=cursor``,
+    then follow the returned ``next``/``previous`` links). Keyset pages skip the total count and
+    cost the same at any depth. ``?ordering=`` sorts by one of ``ITEM_ORDERING_FIELDS``,
+    prefixed with ``-`` for descending.
+
+    Items can be filtered with ``category``, ``min_price``, ``max_price``, ``colors``, ``sizes``,
+    ``active`` and ``shop``. With ``?facets=true`` the response also carries per-category, per-color
+    and per-size counts of the filtered items. ``?fields=name,price,image`` loads and returns only
+    those fields (plus ``id``). ``?image_width=120`` swaps ``image`` for the smallest stored
+    variant at least that wide. Responses are served from ``catalog_cache``, with ETag
+    revalidation, until an item write.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
@@ -219,14 +360,334 @@ def get_all_items(request):
 
     """
     try:
-        paginator = CustomPagination()
-        items = Item.objects.all()
+        filters = _item_filters(request.query_params)
+        fields = ItemSerializer.parse_fields(request.query_params.get('fields'))
+    except ValueError as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def build_response_data():
+        paginator = get_paginator(request, ordering_fields=ITEM_ORDERING_FIELDS)
+        items = Item.objects(**filters)
+        if fields:
+            items = items.only(*ItemSerializer.projection(fields))
         result_page = paginator.paginate_queryset(items, request)
-        serializer = ItemSerializer(result_page, many=True)
+        serializer = ItemSerializer(result_page, many=True, fields=fields, context={'request': request})
+        response_data = {
+            'success': True,
+            'message': 'Items retrieved successfully',
+            'data': serializer.data
+        }
+        if request.query_params.get('facets', '').lower() in ('true', '1'):
+            response_data['facets'] = _item_facets(Item.objects(**filters))
+        return paginator.get_paginated_response(response_data).data
+
+    try:
+        return cached_json_response(request, ('items',), build_response_data)
+    except NotFound as e:
+        return Response({'success': False, 'message': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+def search_items(request):
+    """
+    Full-text search over item name, description and category.
+
+    Results are ranked with BM25 by the in-process ``search_engine`` and paginated with
+    ``?page=``/``?page_size=``. Only active items are searchable. Only the best
+    ``SEARCH_RESULT_LIMIT`` matches are returned, so ``count`` never exceeds it and pages stop
+    there. ``?fields=`` and ``?image_width=`` shape the returned items as in ``get_all_items``.
+    Until the worker's first index build finishes, the view answers 503 with ``Retry-After``.
+
+    Args:
+        request (HttpRequest): The HTTP request object. ``q`` holds the search query.
+
+    Returns:
+        Response: The paginated HTTP response containing the matching items, best match first.
+
+    Raises:
+        Exception: If any error occurs while searching the items.
+
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'success': False, 'message': 'Missing fields: q'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        fields = ItemSerializer.parse_fields(request.query_params.get('fields'))
+    except ValueError as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        paginator = CustomPagination()
+        item_ids = [key for key, _ in search_engine.search(query, limit=SEARCH_RESULT_LIMIT)]
+        page_ids = paginator.paginate_queryset(item_ids, request)
+        page_items = Item.objects(id__in=page_ids)
+        if fields:
+            page_items = page_items.only(*ItemSerializer.projection(fields))
+        items_by_id = {str(item.id): item for item in page_items}
+        items = [items_by_id[item_id] for item_id in page_ids if item_id in items_by_id]
+        serializer = ItemSerializer(items, many=True, fields=fields, context={'request': request})
         return paginator.get_paginated_response({
             'success': True,
             'message': 'Items retrieved successfully',
             'data': serializer.data
         })
+    except IndexNotReady:
+        return Response(
+            {'success': False, 'message': 'Search is starting up, try again shortly'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(SEARCH_RETRY_AFTER)},
+        )
+    except NotFound as e:
+        return Response({'success': False, 'message': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _read_import_rows(upload, file_format):
+    """Yield ``(row number, row)`` pairs from a CSV or JSONL upload, one line at a time."""
+    lines = codecs.iterdecode(upload, 'utf-8-sig')
+    if file_format == 'csv':
+        yield from enumerate(csv.DictReader(lines), start=1)
+        return
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else None
+
+
+def _split_values(value):
+    if isinstance(value, list):
+        return [str(part).strip() for part in value if str(part).strip()]
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def _build_import_item(row, shop):
+    """
+    Build an unsaved item from an import row.
+
+    Raises:
+        ValueError: If the row is missing fields or holds invalid values.
+    """
+    if row is None:
+        raise ValueError('Row is not a JSON object')
+    missing_fields = [field for field in IMPORT_REQUIRED_FIELDS if row.get(field) in (None, '')]
+    if missing_fields:
+        raise ValueError(f'Missing fields: {", ".join(missing_fields)}')
+    try:
+        price, discount, quantity = (Decimal(str(row[field])) for field in ('price', 'discount', 'quantity'))
+    except InvalidOperation:
+        raise ValueError('Invalid decimal values')
+    if not all(value.is_finite() for value in (price, discount, quantity)):
+        # NaN and Infinity parse, but DecimalField validation cannot compare them
+        raise ValueError('Invalid decimal values')
+
+    item = Item(
+        name=row['name'],
+        price=price,
+        discount=discount,
+        quantity=quantity,
+        description=row['description'],
+        colors=_split_values(row.get('colors')),
+        sizes=_split_values(row.get('sizes')),
+        category=row['category'],
+        image=row.get('image') or '',
+        detail_image=_split_values(row.get('detail_image')),
+        shop=shop.id,
+        shop_summary=ShopSummary.from_shop(shop),
+        active=str(row.get('active', True)).lower() not in ('false', '0'),
+    )
+    try:
+        item.validate()
+    except ValidationError as e:
+        raise ValueError('; '.join(f'{field}: {error}' for field, error in e.to_dict().items()))
+    return item
+
+
+def _insert_import_batch(batch, shop, errors):
+    """Insert ``(row number, item)`` pairs with one unordered ``insert_many`` and return the inserted count."""
+    documents = [item.to_mongo() for _, item in batch]
+    failed = set()
+    try:
+        Item._get_collection().insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get('writeErrors', []):
+            failed.add(write_error['index'])
+            errors.append({'row': batch[write_error['index']][0], 'message': write_error.get('errmsg', 'Write failed')})
+
+    inserted = [(item, document) for index, ((_, item), document) in enumerate(zip(batch, documents)) if index not in failed]
+    if not inserted:
+        return 0
+    for item, document in inserted:
+        item.id = document['_id']
+        if item.active:
+            search_engine.add(str(item.id), _search_text(item.name, item.description, item.category))
+    _link_shop_items(shop.id, [item.id for item, _ in inserted])
+    return len(inserted)
+
+
+@api_view(['POST'])
+def import_items(request, shop_id):
+    """
+    Bulk import items into a shop from a CSV or JSONL upload.
+
+    The ``file`` upload is read line by line, validated in batches of ``IMPORT_BATCH_SIZE`` rows and
+    written with one unordered ``insert_many`` per batch. Each batch also appends its item ids to
+    the shop with a single atomic ``$push`` (when ``SHOP_ITEMS_STORED`` is on). Rows use the ``create_item`` field names, with
+    ``colors``, ``sizes`` and ``detail_image`` given as comma separated values (or JSON lists)
+    and ``image`` as an already uploaded URL. The format comes from ``?format=csv|jsonl`` or the
+    file extension.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        shop_id (int): The ID of the shop receiving the items.
+
+    Returns:
+        Response: The HTTP response with the imported and failed row counts and a per-row error report.
+
+    Raises:
+        Shop.DoesNotExist: If the shop with the specified ID does not exist.
+        Exception: If any error occurs while importing the items.
+
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'success': False, 'message': 'Missing fields: file'}, status=status.HTTP_400_BAD_REQUEST)
+    file_format = request.query_params.get('format') or upload.name.rsplit('.', 1)[-1].lower()
+    if file_format == 'ndjson':
+        file_format = 'jsonl'
+    if file_format not in ('csv', 'jsonl'):
+        return Response({'success': False, 'message': 'Unsupported file format, use csv or jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+
+    imported = 0
+    errors = []
+    try:
+        shop = Shop.objects.only('name', 'hotline').get(id=shop_id)
+        batch = []
+        for number, row in _read_import_rows(upload, file_format):
+            try:
+                batch.append((number, _build_import_item(row, shop)))
+            except ValueError as e:
+                errors.append({'row': number, 'message': str(e)})
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                imported += _insert_import_batch(batch, shop, errors)
+                batch = []
+        if batch:
+            imported += _insert_import_batch(batch, shop, errors)
+
+        data = {'imported': imported, 'failed': len(errors), 'errors': errors}
+        return Response({'success': True, 'message': 'Items imported', 'data': data}, status=status.HTTP_200_OK)
+    except Shop.DoesNotExist:
+        return Response({'success': False, 'message': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
+    except UnicodeDecodeError:
+        return Response({'success': False, 'message': 'File must be UTF-8 encoded', 'data': {'imported': imported}}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e), 'data': {'imported': imported}}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    finally:
+        if imported:
+            catalog_cache.bump('items')
+
+
+def _bulk_update_set(patch):
+    """
+    Turn one bulk update patch into a validated ``$set`` document.
+
+    Raises:
+        ValueError: If the patch holds no updatable field or an invalid value.
+    """
+    values = {}
+    for name in BULK_UPDATE_FIELDS:
+        if name not in patch:
+            continue
+        value = patch[name]
+        if name == 'active':
+            if isinstance(value, str):
+                if value.lower() not in ('true', 'false', '1', '0'):
+                    raise ValueError('Invalid active value')
+                value = value.lower() in ('true', '1')
+            values[name] = bool(value)
+            continue
+        try:
+            value = Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f'Invalid {name} value')
+        if not value.is_finite():
+            raise ValueError(f'Invalid {name} value')
+        field = Item._fields[name]
+        try:
+            field.validate(value)
+        except ValidationError as e:
+            raise ValueError(f'{name}: {e.message}')
+        values[name] = field.to_mongo(value)
+    if not values:
+        raise ValueError(f'Nothing to update, expected one of: {", ".join(BULK_UPDATE_FIELDS)}')
+    return values
+
+
+@api_view(['PUT'])
+def bulk_update_items(request):
+    """
+    Apply price, discount, stock and active patches to many items at once.
+
+    The body is a list (or ``{"items": [...]}``) of ``{id, price, discount, quantity, active}``
+    patches, each carrying any subset of those fields. Valid patches are written with one
+    unordered ``bulk_write`` of ``$set`` operations.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+
+    Returns:
+        Response: The HTTP response with the matched and modified counts and the per-id failures.
+
+    Raises:
+        Exception: If any error occurs while updating the items.
+
+    """
+    patches = request.data.get('items') if isinstance(request.data, dict) else request.data
+    if not isinstance(patches, list) or not patches:
+        return Response({'success': False, 'message': 'Expected a non-empty list of item patches'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(patches) > BULK_UPDATE_MAX_PATCHES:
+        return Response({'success': False, 'message': f'At most {BULK_UPDATE_MAX_PATCHES} patches per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+    failed = []
+    operations = []
+    try:
+        for patch in patches:
+            item_id = patch.get('id') if isinstance(patch, dict) else None
+            if not item_id or not ObjectId.is_valid(item_id):
+                failed.append({'id': item_id, 'message': 'Invalid item id'})
+                continue
+            try:
+                operations.append((str(item_id), _bulk_update_set(patch)))
+            except ValueError as e:
+                failed.append({'id': item_id, 'message': str(e)})
+
+        object_ids = list({ObjectId(item_id) for item_id, _ in operations})
+        existing = {str(document['_id']) for document in Item._get_collection().find({'_id': {'$in': object_ids}}, {'_id': 1})}
+        failed.extend({'id': item_id, 'message': 'Item not found'} for item_id, _ in operations if item_id not in existing)
+        operations = [(item_id, values) for item_id, values in operations if item_id in existing]
+
+        matched = modified = 0
+        if operations:
+            requests = [UpdateOne({'_id': ObjectId(item_id)}, {'$set': values}) for item_id, values in operations]
+            try:
+                result = Item._get_collection().bulk_write(requests, ordered=False)
+                matched, modified = result.matched_count, result.modified_count
+            except BulkWriteError as e:
+                matched, modified = e.details.get('nMatched', 0), e.details.get('nModified', 0)
+                failed.extend({'id': operations[error['index']][0], 'message': error.get('errmsg', 'Write failed')} for error in e.details.get('writeErrors', []))
+            catalog_cache.bump('items')
+
+            toggled = [ObjectId(item_id) for item_id, values in operations if 'active' in values]
+            for item in Item.objects(id__in=toggled).only('name', 'description', 'category', 'active'):
+                _index_item(item)
+
+        data = {'matched': matched, 'modified': modified, 'failed': failed}
+        return Response({'success': True, 'message': 'Items updated', 'data': data}, status=status.HTTP_200_OK)
     except Exception as e:
         return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
@@ -1,17 +1,107 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
-from ..models import Order, User, Shop, Item
-from ..serializers import OrderSerializer
-from datetime import datetime
+from ..models import Order, OrderIntake
+from ..serializers import OrderSerializer, OrderSummarySerializer
+from ..placement import PlacementError, place_order, validate_order_request
+from ..idempotency import idempotent
+from ..order_feed import OrderFeed
+from .. import rollup
+from django.http import JsonResponse, StreamingHttpResponse
+from bson import ObjectId
+from datetime import datetime, timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from utils.CustomPagination import CustomCursorPagination
 
 import pytz
 
+# Statuses the bulk endpoint moves orders to, each with the statuses it may be reached from.
+# Orders created without a status count as pending. Other target statuses are not checked.
+ORDER_STATUS_TRANSITIONS = {
+    'confirmed': ('pending', None),
+    'shipped': ('pending', 'confirmed', None),
+    'delivered': ('shipped',),
+    'cancelled': ('pending', 'confirmed', None),
+}
+BULK_STATUS_MAX_ORDERS = 10000
+
+
+def _order_filters(params):
+    """
+    Build the order listing filters from the request query parameters.
+
+    ``from`` and ``to`` take ISO dates or datetimes (naive ones are UTC) and bound ``time`` as
+    ``from <= time < to``.
+
+    Raises:
+        ValueError: If ``is_paid``, ``from`` or ``to`` cannot be parsed.
+    """
+    filters = {}
+    if params.get('status'):
+        filters['status'] = params['status']
+    if params.get('is_paid'):
+        if params['is_paid'].lower() not in ('true', 'false', '1', '0'):
+            raise ValueError('Invalid is_paid value')
+        filters['is_paid'] = params['is_paid'].lower() in ('true', '1')
+    for param, lookup in (('from', 'time__gte'), ('to', 'time__lt')):
+        if params.get(param):
+            try:
+                value = parse_datetime(params[param]) or parse_date(params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                raise ValueError(f'Invalid {param} value')
+            if not isinstance(value, datetime):
+                value = datetime(value.year, value.month, value.day)
+            filters[lookup] = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return filters
+
+
+def _list_orders(request, owner_field, owner_id, message):
+    """
+    Serve one page of the orders whose ``owner_field`` is ``owner_id``, newest first.
+
+    Pages are keyset paginated on ``(time, id)`` through ``?cursor=`` and ``?page_size=``; the
+    response carries ``next``/``previous`` links. ``?ordering=time`` lists oldest first. Filters
+    come from ``_order_filters`` and ``?fields=`` limits the loaded and returned fields. Orders are
+    rendered by ``OrderSummarySerializer``; ``?expand=true`` returns the full nested user and shop.
+    """
+    if not ObjectId.is_valid(owner_id):
+        return Response({'success': False, 'message': f'Invalid {owner_field} id'}, status=status.HTTP_400_BAD_REQUEST)
+    serializer_class = OrderSerializer if request.query_params.get('expand', '').lower() in ('true', '1') else OrderSummarySerializer
+    try:
+        filters = _order_filters(request.query_params)
+        fields = serializer_class.parse_fields(request.query_params.get('fields'))
+    except ValueError as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        orders = Order.objects(**{owner_field: ObjectId(owner_id)}, **filters)
+        if fields:
+            orders = orders.only(*serializer_class.projection(fields))
+        paginator = CustomCursorPagination()
+        paginator.ordering_fields = ('time',)
+        paginator.default_ordering = '-time'
+        result_page = paginator.paginate_queryset(orders, request)
+        orders_data = serializer_class(result_page, many=True, fields=fields).data
+        return paginator.get_paginated_response({'success': True, 'message': message, 'data': orders_data})
+    except NotFound as e:
+        return Response({'success': False, 'message': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
+@idempotent('orders')
 def create_order(request):
     """
     Create a new order.
 
+    Placement is done by ``place_order``, which reserves stock atomically and creates nothing if
+    a line is out of stock. Retries sending the same ``Idempotency-Key`` header get the first
+    response replayed.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
@@ -19,71 +109,93 @@ def create_order(request):
         Response: The HTTP response indicating the success or failure of the operation.
 
     Raises:
-        User.DoesNotExist: If the user with the specified ID does not exist.
-        Item.DoesNotExist: If any of the items with the specified IDs do not exist.
-        Shop.DoesNotExist: If the shop for any item with the specified ID does not exist.
+        PlacementError: If the request is invalid, refers to unknown documents or is out of stock.
         Exception: If any error occurs while creating the order.
 
     """
     try:
-        user_id = request.data.get('user_id')
-        items = request.data.get('items')
-        time = datetime.now().isoformat(timespec='seconds')
-        status = request.data.get('status')
-        address = request.data.get('address')
-        total = request.data.get('total')
-        is_paid = request.data.get('is_paid')
-        # Retrieve the user
-        try:
-            user = User.objects.get(id=user_id)
-        except User.DoesNotExist:
-            return Response({'success': False, 'message': 'User not found'}, status=404)
-
-        # Group items by shop ID
-        items_by_shop = {}
-        for item in items:
-            item_id = item.get('id')
-            item_quantity = item.get('quantity')
-            try:
-                item = Item.objects.get(id=item_id)
-                if item.quantity < item_quantity:
-                    return Response({'success': False, 'message': 'Item is not enough'}, status=400)
-            except Item.DoesNotExist:
-                return Response({'success': False, 'message': 'Item not found'}, status=404)
-        for item in items:
-            item_quantity = item.get('quantity')
-            item_shop_id = item.get('shop_id')
-            try:
-                shop = Shop.objects.get(id=item_shop_id)
-            except Shop.DoesNotExist:
-                return Response({'success': False, 'message': 'Shop not found'}, status=404)
-
-            if item_shop_id not in items_by_shop:
-                items_by_shop[item_shop_id] = []
-            items_by_shop[item_shop_id].append(item)
-
-        orders = []
-        for shop_id, shop_items in items_by_shop.items():
-            shop = Shop.objects.get(id=shop_id)
-            order = Order(user=user, shop=shop, items=shop_items, time=time, status=status, address=address, total=total, is_paid = is_paid)
-            order.save()
-            orders.append(order)
-            for item in shop_items:
-                item_id = item.get('id')
-                item_quantity = item.get('quantity')
-                item = Item.objects.get(id=item_id)
-                item.quantity -= item_quantity
-                item.save()
-        order_data = OrderSerializer(orders, many=True).data
-        return Response({'success': True, 'message': 'Orders created', 'data': order_data}, status=201)
+        orders = place_order(request.data)
+    except PlacementError as e:
+        return Response({'success': False, 'message': e.message}, status=e.status_code)
     except Exception as e:
-        return Response({'success': False, 'message': str(e)}, status=500)
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    order_data = OrderSerializer(orders, many=True).data
+    return Response({'success': True, 'message': 'Orders created', 'data': order_data}, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@idempotent('order_intake')
+def queue_order(request):
+    """
+    Queue an order request for placement by the ``run_order_workers`` pool.
+
+    Only the request's shape is checked before it is stored in one write; stock, users and shops
+    are checked by the worker. Poll ``get_order_intake`` with the returned id for the outcome.
+
+    Args:
+        request (HttpRequest): The HTTP request object, with the body ``create_order`` takes.
+
+    Returns:
+        Response: ``202 Accepted`` with the id and state of the queued request.
+
+    Raises:
+        Exception: If any error occurs while queueing the request.
+
+    """
+    try:
+        validate_order_request(request.data)
+    except PlacementError as e:
+        return Response({'success': False, 'message': e.message}, status=e.status_code)
+    try:
+        fields = ('user_id', 'items', 'status', 'address', 'total', 'is_paid')
+        intake = OrderIntake(payload={field: request.data.get(field) for field in fields}).save()
+        return Response({'success': True, 'message': 'Order queued', 'data': {'id': str(intake.id), 'state': intake.state}}, status=status.HTTP_202_ACCEPTED)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+def get_order_intake(request, id):
+    """
+    Get the state of a queued order request.
+
+    ``state`` is ``queued``, ``processing``, ``placed`` (with the created ``orders``) or ``failed``
+    (with the ``error`` message and the ``error_status`` ``create_order`` would have returned).
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        id (str): The id returned by ``queue_order``.
+
+    Returns:
+        Response: The HTTP response containing the request's state.
+
+    Raises:
+        OrderIntake.DoesNotExist: If no queued request has the specified ID.
+        Exception: If any error occurs while fetching the request.
+
+    """
+    if not ObjectId.is_valid(id):
+        return Response({'success': False, 'message': 'Invalid order request id'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        intake = OrderIntake.objects.exclude('payload').get(id=id)
+        data = {'id': str(intake.id), 'state': intake.state}
+        if intake.state == 'placed':
+            data['orders'] = OrderSummarySerializer(Order.objects(id__in=intake.order_ids), many=True).data
+        elif intake.state == 'failed':
+            data['error'] = intake.error
+            data['error_status'] = intake.error_status
+        return Response({'success': True, 'message': 'Order request fetched successfully', 'data': data}, status=status.HTTP_200_OK)
+    except OrderIntake.DoesNotExist:
+        return Response({'success': False, 'message': 'Order request not found'}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['PUT'])
 def update_order(request, id):
     """
     Update an existing order.
 
+    A ``status`` listed in ``ORDER_STATUS_TRANSITIONS`` is only accepted from its allowed source
+    statuses; other moves get ``409 Conflict``.
+
     Args:
         request (HttpRequest): The HTTP request object.
         id (int): The ID of the order to update.
@@ -98,6 +210,7 @@ def update_order(request, id):
     """
     try:
         order = Order.objects.get(id=id)
+        before = rollup.snapshot(order)
 
         if 'user_id' in request.data:
             order.user = request.data.get('user_id')
@@ -106,14 +219,25 @@ def update_order(request, id):
         if 'items' in request.data:  # Updated field name to 'items'
             order.items = request.data.get('items')  # Updated field name to 'items'
         if 'time' in request.data:
-            order.time = request.data.get('time')
+            try:
+                time = parse_datetime(request.data.get('time') or '')
+            except (TypeError, ValueError):
+                time = None
+            if time is None:
+                return Response({'success': False, 'message': 'Invalid time'}, status=status.HTTP_400_BAD_REQUEST)
+            # Naive timestamps are taken as UTC, like the rest of the stored times
+            order.time = time if time.tzinfo else time.replace(tzinfo=timezone.utc)
         if 'status' in request.data:
-            order.status = request.data.get('status')
+            target = request.data.get('status')
+            if target != order.status and order.status not in ORDER_STATUS_TRANSITIONS.get(target, (order.status,)):
+                return Response({'success': False, 'message': f'Cannot move an order from {order.status} to {target}'}, status=status.HTTP_409_CONFLICT)
+            order.status = target
         if 'address' in request.data:
             order.address = request.data.get('address')
         if 'total' in request.data:
             order.total = request.data.get('total')
         order.save()
+        rollup.record_change(before, order)
 
         return Response({'success': True, 'message': 'Order updated successfully'}, status=status.HTTP_200_OK)
     except Order.DoesNotExist:
@@ -122,6 +246,58 @@ def update_order(request, id):
         return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['PUT'])
+def bulk_update_order_status(request, shop_id):
+    """
+    Move many of a shop's orders to one status at once.
+
+    The body is ``{"ids": [...], "status": "shipped"}`` with a status from
+    ``ORDER_STATUS_TRANSITIONS``. Orders are changed with a single ``update_many`` matching only
+    the shop's orders in an allowed source status; ids that are invalid, unknown, of another shop
+    or in a status the target cannot be reached from are returned as skipped.
+
+    Args:
+        request (HttpRequest): The HTTP request object.
+        shop_id (str): The ID of the shop owning the orders.
+
+    Returns:
+        Response: The HTTP response with the updated and skipped order ids.
+
+    Raises:
+        Exception: If any error occurs while updating the orders.
+
+    """
+    target = request.data.get('status')
+    ids = request.data.get('ids')
+    if target not in ORDER_STATUS_TRANSITIONS:
+        return Response({'success': False, 'message': f'Status must be one of: {", ".join(ORDER_STATUS_TRANSITIONS)}'}, status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(ids, list) or not ids:
+        return Response({'success': False, 'message': 'Expected a non-empty list of order ids'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > BULK_STATUS_MAX_ORDERS:
+        return Response({'success': False, 'message': f'At most {BULK_STATUS_MAX_ORDERS} orders per request'}, status=status.HTTP_400_BAD_REQUEST)
+    if not ObjectId.is_valid(shop_id):
+        return Response({'success': False, 'message': 'Invalid shop id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        object_ids = list({ObjectId(order_id) for order_id in ids if ObjectId.is_valid(str(order_id))})
+        eligible = {'_id': {'$in': object_ids}, 'shop': ObjectId(shop_id), 'status': {'$in': list(ORDER_STATUS_TRANSITIONS[target])}}
+        collection = Order._get_collection()
+        updated = [document['_id'] for document in collection.find(eligible, {'_id': 1})]
+        result = collection.update_many(dict(eligible, _id={'$in': updated}), {'$set': {'status': target, 'updated_at': datetime.now(timezone.utc)}})
+        if result.modified_count != len(updated):
+            # Some orders left an allowed status between the read and the write
+            updated = [document['_id'] for document in collection.find({'_id': {'$in': updated}, 'status': target}, {'_id': 1})]
+
+        updated = {str(order_id) for order_id in updated}
+        data = {
+            'updated': sorted(updated),
+            'skipped': [order_id for order_id in ids if str(order_id) not in updated],
+        }
+        return Response({'success': True, 'message': 'Order statuses updated', 'data': data}, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['DELETE'])
 def delete_order(request, order_id):
     """
@@ -142,6 +318,7 @@ def delete_order(request, order_id):
     try:
         order = Order.objects.get(id=order_id)
         order.delete()
+        rollup.record_deleted(order)
         return Response({'success': True, 'message': 'Order deleted successfully'}, status=status.HTTP_200_OK)
     except Order.DoesNotExist:
         return Response({'success': False, 'message': 'Order not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -152,60 +329,73 @@ def delete_order(request, order_id):
 @api_view(['GET'])
 def get_user_orders(request, id):
     """
-    Get all orders placed by a user.
+    Get the orders placed by a user, newest first.
+
+    Results are cursor paginated (``?cursor=``, ``?page_size=``) and can be filtered by ``?status=``,
+    ``?is_paid=`` and a ``?from=``/``?to=`` time range. ``?fields=status,total,time`` loads and
+    returns only those order fields (plus ``id``). The user and shop are ``{id, name}`` summaries
+    unless ``?expand=true`` asks for the full documents. An unknown user gets an empty page.
 
     Args:
         request (HttpRequest): The HTTP request object.
         id (int): The ID of the user.
 
     Returns:
-        Response: The HTTP response containing the user's orders.
+        Response: The paginated HTTP response containing the user's orders.
 
     Raises:
-        User.DoesNotExist: If the user with the specified ID does not exist.
         Exception: If any error occurs while fetching the user's orders.
 
     """
-    try:
-        user = User.objects.get(id=id)
-        orders = Order.objects.filter(user=user)
-        
-        if not orders:
-            return Response({'success': False, 'message': 'No orders found for the user.'}, status=status.HTTP_404_NOT_FOUND)
-        
-        orders_data = OrderSerializer(orders, many=True).data
-        return Response({'success': True, 'message': 'User orders fetched successfully', 'data': orders_data}, status=status.HTTP_200_OK)
-    except User.DoesNotExist:
-        return Response({'success': False, 'message': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
+    return _list_orders(request, 'user', id, 'User orders fetched successfully')
 
 
 @api_view(['GET'])
 def get_shop_orders(request, id):
     """
-    Get all orders placed for a shop.
+    Get the orders placed for a shop, newest first.
+
+    Paginated, filtered and shaped like ``get_user_orders``. An unknown shop gets an empty page.
 
     Args:
         request (HttpRequest): The HTTP request object.
         id (int): The ID of the shop.
 
     Returns:
-        Response: The HTTP response containing the shop's orders.
+        Response: The paginated HTTP response containing the shop's orders.
 
     Raises:
-        Shop.DoesNotExist: If the shop with the specified ID does not exist.
         Exception: If any error occurs while fetching the shop's orders.
 
     """
-    try:
-        shop = Shop.objects.get(id=id)
-        orders = Order.objects.filter(shop=id)
-        orders_data = OrderSerializer(orders, many=True).data
-        return Response({'success': True, 'message': 'Shop orders fetched successfully', 'data': orders_data}, status=status.HTTP_200_OK)
-    except Shop.DoesNotExist:
-        return Response({'success': False, 'message': 'Shop not found.'}, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return _list_orders(request, 'shop', id, 'Shop orders fetched successfully')
+
+
+async def stream_shop_orders(request, id):
+    """
+    Stream a shop's new orders and order status changes as server-sent events.
+
+    Each ``order`` event carries the compact order and an ``id`` to resume from: browsers resend
+    it as ``Last-Event-ID`` when reconnecting, and other clients may pass ``?last_event_id=``.
+    The view is async and meant to be served through the ASGI application, where an open stream
+    does not hold a worker.
 
+    Args:
+        request (HttpRequest): The HTTP request object.
+        id (str): The ID of the shop.
+
+    Returns:
+        StreamingHttpResponse: The ``text/event-stream`` response.
+
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Method not allowed'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not ObjectId.is_valid(id):
+        return JsonResponse({'success': False, 'message': 'Invalid shop id'}, status=status.HTTP_400_BAD_REQUEST)
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    feed = OrderFeed(id, last_event_id=last_event_id)
+    response = StreamingHttpResponse(feed.stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
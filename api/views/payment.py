@@ -3,13 +3,18 @@ import stripe
 from rest_framework.decorators import api_view
 from django.views.decorators.csrf import csrf_exempt
 import stripe.error
+from ..idempotency import idempotent
 
 @csrf_exempt
 @api_view(['POST'])
+@idempotent('payments')
 def payment_view(request):
     """
     Process a payment.
 
+    Retries sending the same ``Idempotency-Key`` header get the first client secret replayed, and the
+    key is forwarded to Stripe so it never creates a second PaymentIntent either.
+
     Args:
         request (HttpRequest): The HTTP request object.
 
@@ -32,6 +37,7 @@ def payment_view(request):
             automatic_payment_methods={
                 'enabled': True,
             },
+            idempotency_key=request.META.get('HTTP_IDEMPOTENCY_KEY'),
         )
 
         return JsonResponse({'client_secret': intent.client_secret})
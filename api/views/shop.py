@@ -1,12 +1,18 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import NotFound
 from django.forms.models import model_to_dict
-from ..models import Shop, Item, User, Order
+from ..models import Shop, ShopSummary, Item, User, Order, ShopDailySales
 import bcrypt
 from ..serializers import ShopSerializer, ItemSerializer, UserSerializer
-from datetime import datetime, timedelta
+from ..cache import catalog_cache, cached_json_response
+from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
+from bson import ObjectId
+from utils.CustomPagination import get_paginator
+
+SHOP_ITEM_ORDERING_FIELDS = ('price', 'quantity')
 
 @api_view(['POST'])
 def create_shop(request):
@@ -40,6 +46,9 @@ def update_shop(request, shop_id):
     """
     Update a shop.
 
+    Changes to the name or hotline are copied onto the shop summary embedded in every item of
+    the shop with a single multi-document update.
+
     Args:
         request (HttpRequest): The HTTP request object.
         shop_id (int): The ID of the shop to update.
@@ -54,13 +63,18 @@ def update_shop(request, shop_id):
     """
     try:
         shop = Shop.objects.get(id=shop_id)
+        summary = ShopSummary.from_shop(shop)
         shop.name = request.data.get('name', shop.name)
+        shop.hotline = request.data.get('hotline', shop.hotline)
         shop.email = request.data.get('email', shop.email)
         password = request.data.get('password')
         if password:
             hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
             shop.password = hashed_password
         shop.save()
+        if (shop.name, shop.hotline) != (summary.name, summary.hotline):
+            Item.objects(shop=shop.id).update(set__shop_summary=ShopSummary.from_shop(shop))
+            catalog_cache.bump('items')
         return Response({'success': True, 'message': 'Shop updated successfully'}, status=status.HTTP_200_OK)
     except Shop.DoesNotExist:
         return Response({'success': False, 'message': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -88,6 +102,8 @@ def delete_shop(request, shop_id):
     try:
         shop = Shop.objects.get(id=shop_id)
         shop.delete()
+        # Deleting a shop cascades to its items
+        catalog_cache.bump('items')
         return Response({'success': True, 'message': 'Shop deleted successfully'}, status=status.HTTP_200_OK)
     except Shop.DoesNotExist:
         return Response({'success': False, 'message': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -135,27 +151,56 @@ def login_shop(request):
 @api_view(['GET'])
 def get_all_shop_items(request, id):
     """
-    Retrieve all items of a shop.
+    Retrieve the items of a shop, paginated.
+
+    Pagination works as in ``get_all_items`` (``?page=`` or ``?pagination=cursor``). ``?ordering=``
+    takes ``-id`` (newest first, the default), ``price``/``-price`` or ``quantity``/``-quantity``
+    for stock, and ``?active=true|false`` filters on the active flag; each combination is served
+    by a ``(shop, ...)`` index, or a ``(shop, active, ...)`` one with the filter. ``?fields=`` and ``?image_width=`` shape the returned
+    items as in ``get_all_items``. Responses are served from ``catalog_cache``, with ETag
+    revalidation, until an item write.
 
     Args:
         request (HttpRequest): The HTTP request object.
         id (int): The ID of the shop.
 
     Returns:
-        Response: The HTTP response containing the shop items data.
+        Response: The paginated HTTP response containing the shop items data.
 
     Raises:
-        Shop.DoesNotExist: If the shop with the specified ID does not exist.
         Exception: If any error occurs while retrieving the shop items.
 
     """
+    if not ObjectId.is_valid(id):
+        return Response({'success': False, 'message': 'Invalid shop id'}, status=status.HTTP_400_BAD_REQUEST)
+    filters = {'shop': ObjectId(id)}
+    active = request.query_params.get('active', '').lower()
+    if active:
+        if active not in ('true', 'false', '1', '0'):
+            return Response({'success': False, 'message': 'Invalid active value'}, status=status.HTTP_400_BAD_REQUEST)
+        filters['active'] = active in ('true', '1')
     try:
-        shop = Shop.objects.get(id=id)
-        items = Item.objects.filter(shop=shop)
-        items_data = ItemSerializer(items, many=True).data
-        return Response({'success': True, 'message': 'Shop items fetched successfully', 'data': items_data}, status=status.HTTP_200_OK)
-    except Shop.DoesNotExist:
-        return Response({'success': False, 'message': 'Shop not found'}, status=status.HTTP_404_NOT_FOUND)
+        fields = ItemSerializer.parse_fields(request.query_params.get('fields'))
+    except ValueError as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def build_response_data():
+        paginator = get_paginator(request, ordering_fields=SHOP_ITEM_ORDERING_FIELDS, default_ordering='-id')
+        items = Item.objects(**filters)
+        if fields:
+            items = items.only(*ItemSerializer.projection(fields))
+        result_page = paginator.paginate_queryset(items, request)
+        items_data = ItemSerializer(result_page, many=True, fields=fields, context={'request': request}).data
+        return paginator.get_paginated_response({
+            'success': True,
+            'message': 'Shop items fetched successfully',
+            'data': items_data
+        }).data
+
+    try:
+        return cached_json_response(request, ('items',), build_response_data)
+    except NotFound as e:
+        return Response({'success': False, 'message': str(e.detail)}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
         return Response({'success': False, 'message': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -233,44 +278,37 @@ def get_statistics(request, shop_id):
 
     """
     try:
-        shop = Shop.objects.get(id=shop_id)
-        current_time = datetime.now()
+        shop = Shop.objects.only('id').get(id=shop_id)
+        current_time = datetime.now(timezone.utc)
         start_date = current_time - relativedelta(months=5)
         start_date = start_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
         # Include the current month in the range
         end_date = current_time.replace(day=1, hour=0, minute=0, second=0, microsecond=0) + relativedelta(months=1)
+        today = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Sum the shop's daily rollups in the window: one document per day, however many orders
+        days = ShopDailySales.objects(shop=shop.id, day__gte=start_date, day__lt=end_date).only('day', 'revenue')
 
         month_names = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
         sales_last_six_months = {name: 0 for name in month_names}
-        print("current:",current_time)
-        print("start:",start_date)
-        print("end:",end_date)
-
-        orders = Order.objects.filter(shop=shop)
-        for order in orders:
-            order_time = datetime.strptime(order.time[:19], "%Y-%m-%dT%H:%M:%S")
-            print("order_time:",order_time)
-            print()
-            if start_date <= order_time <= end_date:
-                order_month = order_time.month
-                month_name = month_names[order_month - 1]
-                sales_last_six_months[month_name] += order.total
-                print("order_month:",order_month)
-                print("order.total:",order.total)	
-                print("month_name:",month_name)
-                print("sales_last_six_months:",sales_last_six_months)
-        # Calculate the total sales for today
-        today_sales = Order.objects.filter(shop=shop)
-        total_sales_today = sum(order.total for order in today_sales if datetime.strptime(order.time[:19], "%Y-%m-%dT%H:%M:%S").date() == current_time.date())
-
-        # Calculate the total sales for the last week
-        last_week_sales = Order.objects.filter(shop=shop)
-        total_sales_last_week = sum(order.total for order in last_week_sales if (current_time - timedelta(days=7)).date() <= datetime.strptime(order.time[:19], "%Y-%m-%dT%H:%M:%S").date() < current_time.date())
-
-        # Calculate the total sales for the last month
-        last_month_sales = Order.objects.filter(shop=shop)
-        total_sales_last_month = sum(order.total for order in last_month_sales if (current_time - relativedelta(months=1)).date() <= datetime.strptime(order.time[:19], "%Y-%m-%dT%H:%M:%S").date() < current_time.date())
+        periods = {
+            'today': (today, today + timedelta(days=1)),
+            'last_week': (today - timedelta(days=7), today),
+            'last_month': (today - relativedelta(months=1), today),
+        }
+        period_totals = {name: 0 for name in periods}
+        # The window spans six months, so month numbers never repeat within it
+        for day in days:
+            sales_last_six_months[month_names[day.day.month - 1]] += day.revenue
+            for name, (start, end) in periods.items():
+                if start <= day.day < end:
+                    period_totals[name] += day.revenue
+
+        # Calculate the total sales for today, the last week and the last month
+        total_sales_today = period_totals['today']
+        total_sales_last_week = period_totals['last_week']
+        total_sales_last_month = period_totals['last_month']
 
         data = {
             "sales_last_six_months": sales_last_six_months,
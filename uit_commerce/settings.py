@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 # import pymongo
 
@@ -137,6 +138,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Keep Shop.items as a stored list of item references, maintained with atomic $push/$pull.
+# When disabled a shop's items are derived from the indexed Item.shop field instead; run
+# `python manage.py migrate_shop_items --drop` after switching it off.
+SHOP_ITEMS_STORED = os.getenv('SHOP_ITEMS_STORED', 'true').lower() != 'false'
+
+# Place multi-shop orders inside one MongoDB transaction instead of compensating failed writes by
+# hand. Transactions need a replica set or sharded cluster, so this is off by default.
+ORDER_TRANSACTIONS = os.getenv('ORDER_TRANSACTIONS', 'false').lower() == 'true'
+
+# Feed shop order events from a MongoDB change stream when the server supports them (replica sets).
+# When off, or on a standalone server, the feed polls the orders instead.
+ORDER_FEED_CHANGE_STREAMS = os.getenv('ORDER_FEED_CHANGE_STREAMS', 'true').lower() != 'false'
+
+# Build the in-process item search index on a background thread as soon as the item views load,
+# instead of on the first search. Searches answer 503 until the first build finishes.
+SEARCH_INDEX_PRELOAD = os.getenv('SEARCH_INDEX_PRELOAD', 'true').lower() != 'false'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
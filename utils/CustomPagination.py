@@ -1,5 +1,175 @@
-from rest_framework.pagination import PageNumberPagination
-class CustomPagination(PageNumberPagination):
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from bson import ObjectId
+from mongoengine import ValidationError
+from mongoengine.queryset.visitor import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class OrderingMixin:
+    """Parse ``?ordering=`` into a whitelisted sort field and direction, with ``id`` as the tie-breaker."""
+    ordering_query_param = 'ordering'
+    ordering_fields = ()
+    default_ordering = 'id'
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        field = ordering.lstrip('-')
+        if field != 'id' and field not in self.ordering_fields:
+            field, ordering = self.default_ordering.lstrip('-'), self.default_ordering
+        return field, ordering.startswith('-')
+
+
+class CustomPagination(OrderingMixin, PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if hasattr(queryset, 'order_by'):
+            field, descending = self.get_ordering(request)
+            sign = '-' if descending else ''
+            queryset = queryset.order_by(*([sign + 'id'] if field == 'id' else [sign + field, sign + 'id']))
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CustomCursorPagination(OrderingMixin, BasePagination):
+    """
+    Keyset pagination over a mongoengine queryset.
+
+    Pages are addressed by an opaque cursor holding the ``(sort_field, id)`` pair of the
+    row at the page boundary, so every page is a single indexed range query with no
+    ``count()`` and no ``skip()``.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.sort_field, self.descending = self.get_ordering(request)
+        cursor = self.decode_cursor(request, queryset._document)
+        reverse = bool(cursor and cursor['r'])
+
+        # Walking backwards flips both the sort direction and the boundary comparison.
+        descending = self.descending != reverse
+        lookup = 'lt' if descending else 'gt'
+        sign = '-' if descending else ''
+        order_by = [sign + 'id'] if self.sort_field == 'id' else [sign + self.sort_field, sign + 'id']
+
+        if queryset._loaded_fields:
+            # Sparse fieldsets still need the sort key to build the boundary cursors.
+            queryset = queryset.only(self.sort_field)
+
+        if cursor:
+            if self.sort_field == 'id':
+                queryset = queryset.filter(**{'id__' + lookup: cursor['id']})
+            else:
+                queryset = queryset.filter(
+                    Q(**{self.sort_field + '__' + lookup: cursor['v']}) |
+                    Q(**{self.sort_field: cursor['v'], 'id__' + lookup: cursor['id']})
+                )
+
+        rows = list(queryset.order_by(*order_by).limit(self.page_size + 1))
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, instance, reverse):
+        position = {'id': str(instance.id), 'r': int(reverse)}
+        if self.sort_field != 'id':
+            value = getattr(instance, self.sort_field)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            position['v'] = None if value is None else str(value)
+        token = base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('utf-8'))
+        return replace_query_param(self.base_url, self.cursor_query_param, token.decode('ascii'))
+
+    def decode_cursor(self, request, document=None):
+        """
+        Return the position held by the request's cursor, or None without one.
+
+        The boundary value is checked against the sort field of ``document`` so that a tampered
+        cursor cannot reach the query.
+
+        Raises:
+            NotFound: If the cursor is malformed or holds values the listing cannot be sorted by.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            if not ObjectId.is_valid(str(position['id'])):
+                raise ValueError
+            value = position.get('v')
+            if self.sort_field != 'id':
+                if 'v' not in position:
+                    raise ValueError
+                if value is not None and document is not None:
+                    field = document._fields[self.sort_field]
+                    value = field.to_python(value)
+                    field.validate(value)
+            return {'id': str(position['id']), 'v': value, 'r': bool(position.get('r'))}
+        except (TypeError, ValueError, KeyError, UnicodeError, ArithmeticError, ValidationError):
+            raise NotFound('Invalid cursor')
+
+
+def get_paginator(request, ordering_fields=(), default_ordering='id'):
+    """
+    Pick the paginator for a listing request.
+
+    Requests carrying ``?pagination=cursor`` or a ``cursor`` token get keyset pagination,
+    everything else keeps the page-number pagination. Both honour ``?ordering=`` over
+    ``ordering_fields``.
+    """
+    if request.query_params.get('pagination') == 'cursor' or 'cursor' in request.query_params:
+        paginator = CustomCursorPagination()
+    else:
+        paginator = CustomPagination()
+    paginator.ordering_fields = ordering_fields
+    paginator.default_ordering = default_ordering
+    return paginator
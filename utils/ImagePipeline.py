@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+
+class ImagePipeline:
+    """
+    Decode an uploaded image once and render resized WebP variants of it on a thread pool.
+
+    Pillow releases the GIL while resizing and encoding, so the variants render in parallel.
+    Variants are only produced for widths smaller than the source image; an image narrower than
+    every width gets a single WebP variant at its own width.
+    """
+
+    def __init__(self, widths=(120, 360, 720), quality=80, max_workers=4):
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-variant')
+
+    def render(self, file):
+        """
+        Return ``{width: file-like WebP body}`` for ``file``, rewinding ``file`` afterwards.
+
+        Raises:
+            ValueError: If ``file`` is not a decodable image.
+        """
+        try:
+            image = Image.open(file)
+            if image.format == 'JPEG':
+                # Let libjpeg decode at the smallest scale still covering the largest variant
+                image.draft('RGB', (self.widths[-1], self.widths[-1]))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            raise ValueError('Invalid image file')
+        finally:
+            file.seek(0)
+
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        widths = [width for width in self.widths if width < image.width] or [image.width]
+        futures = {width: self._executor.submit(self._render_variant, image, width) for width in widths}
+        return {width: future.result() for width, future in futures.items()}
+
+    def _render_variant(self, image, width):
+        height = max(round(image.height * width / image.width), 1)
+        variant = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        body = BytesIO()
+        variant.save(body, 'WEBP', quality=self.quality, method=4)
+        body.seek(0)
+        body.name = f'{width}w.webp'
+        return body
+
+
+def pick_variant(variants, width, default):
+    """Return the URL of the smallest variant at least ``width`` pixels wide, falling back to ``default``."""
+    if not variants or not width:
+        return default
+    for variant_width, url in sorted((int(key), url) for key, url in variants.items()):
+        if variant_width >= width:
+            return url
+    return default
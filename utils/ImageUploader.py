@@ -0,0 +1,63 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class UploadError(Exception):
+    pass
+
+
+class ImageUploader:
+    """
+    Upload several images concurrently on a bounded, process-wide thread pool.
+
+    ``upload(file, timeout=...)`` must return a dict holding ``secure_url`` and ``public_id`` (the
+    Cloudinary uploader contract) and ``destroy(public_id)`` removes an uploaded asset. Both are
+    injected so a local stand-in can replace Cloudinary.
+    """
+
+    def __init__(self, upload, destroy, max_workers=4, timeout=30):
+        self.upload = upload
+        self.destroy = destroy
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-upload')
+
+    def upload_all(self, files):
+        """
+        Upload ``files`` concurrently and return their results in input order.
+
+        Every upload gets ``timeout`` seconds. If one fails or times out, the uploads that did
+        succeed, including ones finishing after the failure, are destroyed before raising.
+
+        Raises:
+            UploadError: If any upload fails or times out.
+        """
+        futures = [self._executor.submit(self.upload, file, timeout=self.timeout) for file in files]
+        # Uploads queue behind each other once the pool is busy, so the overall wait scales with the rounds
+        deadline = time.monotonic() + self.timeout * math.ceil(len(futures) / self.max_workers)
+        results = []
+        try:
+            for future in futures:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+        except Exception as e:
+            for future in futures[len(results):]:
+                if not future.cancel():
+                    future.add_done_callback(self._discard_future)
+            self.discard(results)
+            if isinstance(e, TimeoutError):
+                raise UploadError('Image upload timed out')
+            raise UploadError(f'Image upload failed: {e}')
+        return results
+
+    def discard(self, results):
+        """Destroy uploaded assets, ignoring errors so cleanup never masks the original failure."""
+        for result in results:
+            try:
+                self.destroy(result['public_id'])
+            except Exception:
+                pass
+
+    def _discard_future(self, future):
+        if not future.cancelled() and future.exception() is None:
+            self.discard([future.result()])
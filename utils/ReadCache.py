@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalVersionStore:
+    """Collection versions kept in process memory."""
+
+    def __init__(self):
+        self._versions = {}
+
+    def get(self, name):
+        return self._versions.get(name, 0)
+
+    def bump(self, name):
+        self._versions[name] = self._versions.get(name, 0) + 1
+        return self._versions[name]
+
+
+class ReadCache:
+    """
+    Bounded LRU cache with a per-entry TTL, keyed by collection versions.
+
+    Every entry key carries the current version of the collections it was built from. Bumping
+    a collection's version makes the old entries unreachable, and they age out through LRU
+    eviction or their TTL, so writers never have to flush the cache.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60, versions=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.versions = versions or LocalVersionStore()
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_set(self, collections, key, builder):
+        """Return the cached value for ``key``, calling ``builder`` to fill it on a miss."""
+        cache_key = (key,) + tuple(self.versions.get(name) for name in collections)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = builder()
+        with self._lock:
+            self._entries[cache_key] = (now + self.ttl, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def bump(self, *collections):
+        for name in collections:
+            self.versions.bump(name)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+            }
@@ -1,12 +1,226 @@
+import heapq
+import math
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import Counter
 
-# class ItemDocument(Document):
-#     name = Text()
+TOKEN_PATTERN = re.compile(r'\w+')
 
-#     class Index:
-#         name = 'items'  # Specify the Elasticsearch index name
 
-#     @classmethod
-#     def search(cls, query):
-#         search = Search(index=cls.Index.name).query('match', name=query)
-#         response = search.execute()
-#         return response
\ No newline at end of file
+def tokenize(text):
+    """
+    Split text into lowercase, accent-folded tokens.
+
+    Vietnamese diacritics are folded so that ``"áo"`` and ``"ao"`` match the same postings.
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text.lower()).replace('đ', 'd')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return TOKEN_PATTERN.findall(text)
+
+
+class _Index:
+    """
+    The postings of one build of a ``SearchEngine``.
+
+    Every term keeps its postings as two parallel ``array`` objects (document numbers and term
+    frequencies). Removing a document only tombstones it; postings are compacted once dead
+    entries outnumber a quarter of the live documents.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.df = {}
+        self.doc_keys = []
+        self.doc_terms = []
+        self.doc_lengths = array('I')
+        self.key_to_doc = {}
+        self.total_length = 0
+        self.dead = 0
+
+    def add(self, key, text):
+        counts = Counter(tokenize(text))
+        if not counts:
+            return
+        doc = len(self.doc_keys)
+        self.doc_keys.append(key)
+        self.doc_terms.append(tuple(counts))
+        length = sum(counts.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        self.key_to_doc[key] = doc
+        for term, tf in counts.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = (array('I'), array('H'))
+            postings[0].append(doc)
+            postings[1].append(min(tf, 0xFFFF))
+            self.df[term] = self.df.get(term, 0) + 1
+
+    def remove(self, key):
+        doc = self.key_to_doc.pop(key, None)
+        if doc is None:
+            return
+        for term in self.doc_terms[doc]:
+            self.df[term] -= 1
+            if not self.df[term]:
+                del self.df[term]
+                del self.postings[term]
+        self.total_length -= self.doc_lengths[doc]
+        self.doc_keys[doc] = None
+        self.doc_terms[doc] = ()
+        self.dead += 1
+
+    def maybe_compact(self):
+        if self.dead < 1000 or self.dead * 4 < len(self.key_to_doc):
+            return
+        doc_keys = self.doc_keys
+        for term, (docs, freqs) in list(self.postings.items()):
+            kept = [(doc, tf) for doc, tf in zip(docs, freqs) if doc_keys[doc] is not None]
+            self.postings[term] = (array('I', (doc for doc, _ in kept)), array('H', (tf for _, tf in kept)))
+        self.dead = 0
+
+
+class IndexNotReady(Exception):
+    """Raised by ``SearchEngine.search`` while the first build of the index is still running."""
+    pass
+
+
+class SearchEngine:
+    """
+    In-process inverted index ranked with BM25.
+
+    ``loader`` is a callable returning ``(key, text)`` pairs for every searchable document. It
+    is used to build the index on a background thread, started by ``ensure_built`` or the first
+    query, and to rebuild it once it is older than ``max_age`` seconds, which brings in writes
+    handled by other worker processes.
+
+    Builds load into a fresh index without holding the lock, so queries and writes keep using
+    the current index meanwhile. Writes arriving during a build are replayed onto the new index
+    before it is swapped in. No query waits for a build: until the first one finishes,
+    ``search`` raises ``IndexNotReady``.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, loader=None, max_age=300):
+        self.loader = loader
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._index = None
+        self._built_at = None
+        self._pending = None  # Writes seen while a build runs, replayed onto the new index
+
+    def __len__(self):
+        index = self._index
+        return len(index.key_to_doc) if index else 0
+
+    def rebuild(self, documents=None):
+        """Replace the whole index with ``documents`` (defaults to everything ``loader`` returns)."""
+        with self._build_lock:
+            self._rebuild(documents)
+
+    def _rebuild(self, documents=None):
+        with self._lock:
+            self._pending = []
+        try:
+            if documents is None:
+                documents = self.loader() if self.loader else []
+            index = _Index()
+            for key, text in documents:
+                index.add(key, text)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for key, text in self._pending:
+                index.remove(key)
+                if text is not None:
+                    index.add(key, text)
+            index.maybe_compact()
+            self._index, self._pending = index, None
+            self._built_at = time.monotonic()
+
+    def _refresh_in_background(self):
+        try:
+            self._rebuild()
+        finally:
+            self._build_lock.release()
+
+    def ensure_built(self):
+        """
+        Start a background build if there is no index yet or it is older than ``max_age``.
+
+        Returns:
+            bool: Whether an index is available to query. A stale index keeps serving until the
+            new one is swapped in.
+        """
+        index_ready = self._index is not None
+        if index_ready and time.monotonic() - self._built_at <= self.max_age:
+            return True
+        if self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._refresh_in_background, name='search-rebuild', daemon=True).start()
+        return index_ready
+
+    def add(self, key, text):
+        """Index ``text`` under ``key``, replacing any previous version of the document."""
+        self._write(key, text)
+
+    def remove(self, key):
+        self._write(key, None)
+
+    def _write(self, key, text):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((key, text))
+            if self._index is None:
+                # The first build loads the document from the loader, or replays it from _pending
+                return
+            self._index.remove(key)
+            if text is not None:
+                self._index.add(key, text)
+            self._index.maybe_compact()
+
+    def search(self, query, limit=1000):
+        """
+        Return the ``limit`` best ``(key, score)`` pairs, best match first.
+
+        Matches beyond ``limit`` are dropped, so callers counting or paginating the results only
+        ever see the top ``limit`` of them.
+
+        Raises:
+            IndexNotReady: If the first build of the index has not finished yet.
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        if not self.ensure_built():
+            raise IndexNotReady()
+        with self._lock:
+            index = self._index
+            live = len(index.key_to_doc)
+            if not live:
+                return []
+            average_length = index.total_length / live
+            doc_keys = index.doc_keys
+            doc_lengths = index.doc_lengths
+            scores = {}
+            for term in terms:
+                df = index.df.get(term)
+                if not df:
+                    continue
+                idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+                docs, freqs = index.postings[term]
+                for doc, tf in zip(docs, freqs):
+                    if doc_keys[doc] is None:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * doc_lengths[doc] / average_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            best = heapq.nlargest(limit, scores.items(), key=lambda entry: entry[1])
+            return [(doc_keys[doc], score) for doc, score in best]